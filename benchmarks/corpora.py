@@ -0,0 +1,128 @@
+import io
+import random
+import string
+from functools import lru_cache
+
+LINE_COUNTS = {
+    "1K": 1_000,
+    "10K": 10_000,
+    "100K": 100_000,
+    "1M": 1_000_000,
+    "10M": 10_000_000,
+}
+
+JSON_SIZES = {
+    "1KB": 1024,
+    "100KB": 100 * 1024,
+    "1MB": 1024 * 1024,
+    "50MB": 50 * 1024 * 1024,
+    "500MB": 500 * 1024 * 1024,
+}
+
+JSON_SHAPES = ["records", "wide", "deep"]
+
+# Nesting depth of the "deep" shape, well beyond the recursion limit of json.loads,
+# so only the functions that do not parse with json.loads are measured on it.
+DEEP_SHAPE_DEPTH = 5000
+
+SEED = 42
+
+
+@lru_cache(maxsize=2)
+def make_lines(count: int) -> list[str]:
+    """
+    Generates lines that look like host names, package ids and log messages.
+
+    :param count: The number of lines to generate.
+    :return: The list of generated lines.
+    """
+    generator = random.Random(SEED)
+    templates = [
+        "host-{}.{}.example.com",
+        "com.{}.{}.package",
+        "ERROR [{}] request {} failed",
+        "{} {}",
+    ]
+    words = [
+        "".join(generator.choices(string.ascii_letters, k=generator.randint(3, 12)))
+        for _ in range(1000)
+    ]
+    return [
+        generator.choice(templates).format(
+            generator.choice(words), generator.randint(0, 99999)
+        )
+        for _ in range(count)
+    ]
+
+
+@lru_cache(maxsize=2)
+def make_text(count: int) -> str:
+    """
+    Generates a text with count lines with some indentation and blank lines.
+
+    :param count: The number of lines of the text.
+    :return: The generated text.
+    """
+    lines = make_lines(count)
+    return "\n".join(
+        "  " + line if index % 3 == 0 else line + ("\n" if index % 7 == 0 else "")
+        for index, line in enumerate(lines)
+    )
+
+
+@lru_cache(maxsize=2)
+def make_json(shape: str, size: int) -> str:
+    """
+    Generates a minified JSON document of at least the given size.
+
+    Shapes:
+    - records: an array of small flat objects, like an API response;
+    - wide: one object with a lot of keys;
+    - deep: an array of objects nested DEEP_SHAPE_DEPTH levels deep.
+
+    :param shape: One of JSON_SHAPES.
+    :param size: The minimal size of the document in characters.
+    :return: The generated JSON document.
+    """
+    generator = random.Random(SEED)
+    output = io.StringIO()
+    if shape == "records":
+        output.write("[")
+        index = 0
+        while output.tell() < size:
+            if index:
+                output.write(",")
+            output.write(
+                '{{"id":{},"name":"item-{}","active":{},"score":{},"tags":["a","b"],'
+                '"owner":null}}'.format(
+                    index,
+                    generator.randint(0, 10**6),
+                    "true" if index % 2 else "false",
+                    round(generator.random() * 100, 3),
+                )
+            )
+            index += 1
+        output.write("]")
+    elif shape == "wide":
+        output.write("{")
+        index = 0
+        while output.tell() < size:
+            if index:
+                output.write(",")
+            output.write('"key_{}":{}'.format(index, generator.randint(0, 10**6)))
+            index += 1
+        output.write("}")
+    elif shape == "deep":
+        output.write("[")
+        index = 0
+        while output.tell() < size:
+            if index:
+                output.write(",")
+            output.write('{"level":' * DEEP_SHAPE_DEPTH)
+            output.write('"leaf-{}"'.format(index))
+            output.write("}" * DEEP_SHAPE_DEPTH)
+            index += 1
+        output.write("]")
+    else:
+        raise ValueError("Unknown JSON shape ({})".format(shape))
+    return output.getvalue()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+import string
+import time
+
+import core.string_utils as su
+
+
+def make_corpus(count: int, seed: int = 42) -> list[str]:
+    """
+    Generates random mixed-case lines of 8 to 40 characters.
+
+    :param count: The number of lines to generate.
+    :param seed: The seed of the random generator.
+    :return: The list of generated lines.
+    """
+    generator = random.Random(seed)
+    return [
+        "".join(generator.choices(string.ascii_letters, k=generator.randint(8, 40)))
+        for _ in range(count)
+    ]
+
+
+def sequential_sort(lines: list[str], order: str, case_insensitive: bool) -> list[str]:
+    """
+    The sorted() based path of sort_lines.
+    """
+    result = sorted(lines, key=str.casefold if case_insensitive else None)
+    if order == su.DESC:
+        result.reverse()
+    return result
+
+
+def measure(func, *args, **kwargs) -> tuple[float, list[str]]:
+    """
+    Calls the function once and returns the elapsed time with its result.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compares sorted() with parallel_sort_lines."
+    )
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    lines = make_corpus(args.lines)
+    print("lines={} workers={}".format(args.lines, args.workers))
+    print(
+        "{:<5} {:<16} {:>10} {:>10} {:>8}".format(
+            "order", "case_insensitive", "sorted", "parallel", "speedup"
+        )
+    )
+    for order in [su.ASC, su.DESC]:
+        for case_insensitive in [False, True]:
+            sequential_time, expected = measure(
+                sequential_sort, lines, order, case_insensitive
+            )
+            parallel_time, result = measure(
+                su.parallel_sort_lines,
+                lines,
+                order=order,
+                case_insensitive=case_insensitive,
+                workers=args.workers,
+            )
+            assert result == expected, "parallel sort result differs"
+            print(
+                "{:<5} {:<16} {:>9.3f}s {:>9.3f}s {:>7.2f}x".format(
+                    order,
+                    str(case_insensitive),
+                    sequential_time,
+                    parallel_time,
+                    sequential_time / parallel_time,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import benchmarks.corpora as corpora
+import core.json_utils as ju
+import core.string_utils as su
+import core.terminal_commands as tc
+
+PROFILES = {
+    "quick": {
+        "lines": ["1K", "10K", "100K"],
+        "json": ["1KB", "100KB", "1MB"],
+    },
+    "full": {
+        "lines": ["1K", "100K", "1M", "10M"],
+        "json": ["1KB", "1MB", "50MB", "500MB"],
+    },
+}
+
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_REPEAT = 3
+
+# Results of the quick profile with the hardware they were measured on.
+REFERENCE_BASELINE = os.path.join(os.path.dirname(__file__), "baseline_quick.json")
+
+# Measurements below these values are too noisy to be reported as regressions.
+MIN_COMPARED_VALUES = {"seconds": 0.005, "peak_bytes": 64 * 1024}
+
+
+class BenchmarkCase:
+    """
+    A single measured call: the setup prepares the arguments outside of the
+    measurement, the function is the measured call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        size: str,
+        setup: Callable[[], tuple],
+        function: Callable,
+    ) -> None:
+        """
+        Initializes the BenchmarkCase object.
+
+        :param name: The name of the benchmarked operation.
+        :param size: The label of the input size.
+        :param setup: The function returning the arguments of the measured call.
+        :param function: The measured function.
+        """
+        self.name: str = name
+        self.size: str = size
+        self.setup: Callable[[], tuple] = setup
+        self.function: Callable = function
+
+    @property
+    def case_id(self) -> str:
+        """
+        Returns the identifier of the case in results and baselines.
+
+        :return: The case identifier, e.g. "sort_lines@100K".
+        """
+        return "{}@{}".format(self.name, self.size)
+
+
+def build_cases(profile: str) -> list[BenchmarkCase]:
+    """
+    Builds the benchmark cases of the profile.
+
+    :param profile: One of PROFILES.
+    :return: The list of cases.
+    """
+    sizes = PROFILES[profile]
+    cases: list[BenchmarkCase] = []
+    for size in sizes["lines"]:
+        cases.extend(_string_utils_cases(size, corpora.LINE_COUNTS[size]))
+        cases.extend(_terminal_commands_cases(size, corpora.LINE_COUNTS[size]))
+    for size in sizes["json"]:
+        for shape in corpora.JSON_SHAPES:
+            cases.extend(_json_utils_cases(shape, size, corpora.JSON_SIZES[size]))
+    return cases
+
+
+def _string_utils_cases(size: str, count: int) -> list[BenchmarkCase]:
+    def text() -> tuple:
+        return (corpora.make_text(count),)
+
+    def lines() -> tuple:
+        return (list(corpora.make_lines(count)),)
+
+    def data() -> tuple:
+        return (corpora.make_text(count).encode("utf-8"),)
+
+    def byte_lines() -> tuple:
+        return ([line.encode("utf-8") for line in corpora.make_lines(count)],)
+
+    def lines_and_patterns() -> tuple:
+        patterns = {line.split()[0][:8] for line in corpora.make_lines(1_000)}
+        return list(corpora.make_lines(count)), sorted(patterns)
+
+    return [
+        BenchmarkCase("make_lines", size, text, su.make_lines),
+        BenchmarkCase("make_lines_bytes", size, data, su.make_lines),
+        BenchmarkCase("sort_lines", size, lines, su.sort_lines),
+        BenchmarkCase("sort_lines_bytes", size, byte_lines, su.sort_lines),
+        BenchmarkCase(
+            "sort_lines_case_insensitive",
+            size,
+            lines,
+            lambda items: su.sort_lines(items, case_insensitive=True),
+        ),
+        BenchmarkCase(
+            "sort_lines_by_fields",
+            size,
+            lines,
+            lambda items: su.sort_lines_by_fields(
+                items, [(1, su.FIELD_NUMERIC), (0, su.FIELD_LEXICOGRAPHIC)]
+            ),
+        ),
+        BenchmarkCase(
+            "filter_lines_exclude",
+            size,
+            lines_and_patterns,
+            lambda items, patterns: su.filter_lines(items, patterns, su.FILTER_EXCLUDE),
+        ),
+        BenchmarkCase(
+            "join_lines", size, lines, lambda items: su.join_lines(items, "\n")
+        ),
+        BenchmarkCase(
+            "join_lines_bytes",
+            size,
+            byte_lines,
+            lambda items: su.join_lines(items, "\n"),
+        ),
+    ]
+
+
+def _terminal_commands_cases(size: str, count: int) -> list[BenchmarkCase]:
+    def commands() -> tuple:
+        return (corpora.make_lines(count),)
+
+    return [
+        BenchmarkCase("join_commands_in_one", size, commands, tc.join_commands_in_one)
+    ]
+
+
+def _json_utils_cases(shape: str, size: str, length: int) -> list[BenchmarkCase]:
+    def document() -> tuple:
+        # Cached documents would turn repeated calls into cache lookups.
+        ju.clear_json_cache()
+        return (corpora.make_json(shape, length),)
+
+    cases: list[BenchmarkCase] = [
+        BenchmarkCase(
+            "validate_json[{}]".format(shape), size, document, ju.validate_json
+        ),
+        BenchmarkCase("check_json[{}]".format(shape), size, document, ju.check_json),
+        BenchmarkCase(
+            "iter_json_children[{}]".format(shape),
+            size,
+            document,
+            lambda json_string: sum(1 for _ in ju.iter_json_children(json_string)),
+        ),
+        BenchmarkCase(
+            "reformat_json[{}]".format(shape),
+            size,
+            document,
+            # Indenting the deep shape writes thousands of spaces per line, which
+            # would be measured instead of the parsing.
+            (
+                (lambda json_string: ju.reformat_json(json_string, indentation=None))
+                if shape == "deep"
+                else ju.reformat_json
+            ),
+        ),
+        BenchmarkCase(
+            "flatten_json_paths[{}]".format(shape),
+            size,
+            document,
+            ju.flatten_json_paths,
+        ),
+        BenchmarkCase(
+            "diff_json[{}]".format(shape),
+            size,
+            document,
+            # A few digits changed, so the documents are compared structurally.
+            lambda json_string: ju.diff_json(
+                json_string, json_string.replace("1", "2", 3)
+            ),
+        ),
+    ]
+    if shape != "deep":
+        # The deep shape is nested beyond what json.loads can parse.
+        cases[:0] = [
+            BenchmarkCase(
+                "format_json[{}]".format(shape), size, document, ju.format_json
+            ),
+            BenchmarkCase(
+                "flatten_json[{}]".format(shape), size, document, ju.flatten_json
+            ),
+        ]
+    return cases
+
+
+def run_case(case: BenchmarkCase, repeat: int) -> dict:
+    """
+    Measures the best time of repeat calls and the peak memory of one more call.
+
+    Memory is measured separately because tracemalloc slows the calls down.
+
+    :param case: The case to run.
+    :param repeat: The number of timed calls.
+    :return: The result with seconds and peak_bytes.
+    """
+    best: float = float("inf")
+    for _ in range(repeat):
+        args: tuple = case.setup()
+        gc.collect()
+        start: float = time.perf_counter()
+        case.function(*args)
+        best = min(best, time.perf_counter() - start)
+        del args
+
+    args = case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def compare_results(
+    results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[str]:
+    """
+    Compares results with a baseline.
+
+    :param results: The results of the current run, by case id.
+    :param baseline: The stored results, by case id.
+    :param threshold: The allowed relative growth of time and peak memory, e.g. 0.2 for 20%.
+    :return: The list of regression messages, empty when there are none.
+    """
+    regressions: list[str] = []
+    for case_id, result in results.items():
+        expected: dict | None = baseline.get(case_id)
+        if not expected:
+            continue
+        for metric, min_value in MIN_COMPARED_VALUES.items():
+            if max(expected[metric], result[metric]) < min_value:
+                continue
+            ratio: float = result[metric] / max(expected[metric], min_value)
+            if ratio > 1 + threshold:
+                regressions.append(
+                    "{} {}: {:.6g} -> {:.6g} (+{:.0%})".format(
+                        case_id, metric, expected[metric], result[metric], ratio - 1
+                    )
+                )
+    return regressions
+
+
+def describe_hardware() -> dict:
+    """
+    Describes the machine the suite runs on, to tell whether results are comparable.
+
+    :return: The CPU model, the number of CPUs, the architecture and the Python version.
+    """
+    cpu: str = platform.processor()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    cpu = line.partition(":")[2].strip()
+                    break
+    except OSError:
+        pass
+    return {
+        "cpu": cpu,
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the suite from the command line.
+
+    :param argv: The command line arguments. Default is sys.argv.
+    :return: The exit code, 1 when a regression against the baseline was found.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks core.string_utils, core.json_utils and "
+        "core.terminal_commands on synthetic corpora.",
+    )
+    parser.add_argument("--profile", choices=list(PROFILES), default="quick")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--filter", default="", help="run only cases whose id contains this text"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument(
+        "--baseline",
+        nargs="?",
+        const=REFERENCE_BASELINE,
+        help="compare results with this results file, or with the reference results "
+        "of the quick profile (benchmarks/baseline_quick.json) when no file is given",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed relative regression of time and peak memory (default 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    results: dict = {}
+    for case in build_cases(args.profile):
+        if args.filter not in case.case_id:
+            continue
+        result: dict = run_case(case, args.repeat)
+        results[case.case_id] = result
+        print(
+            "{:<48} {:>10.4f}s {:>10.1f}MB".format(
+                case.case_id, result["seconds"], result["peak_bytes"] / 2**20
+            ),
+            flush=True,
+        )
+
+    hardware: dict = describe_hardware()
+    report: dict = {"hardware": hardware, "profile": args.profile, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline_report: dict = json.load(baseline_file)
+        baseline_hardware: dict = baseline_report.get("hardware", {})
+        if any(
+            baseline_hardware.get(name) != hardware[name]
+            for name in ("cpu", "cpu_count", "machine")
+        ):
+            print(
+                "WARNING the baseline was measured on other hardware ({}), times are "
+                "not comparable".format(
+                    json.dumps(baseline_hardware, sort_keys=True)
+                    if baseline_hardware
+                    else "unknown"
+                ),
+                file=sys.stderr,
+            )
+        regressions: list[str] = compare_results(
+            results, baseline_report["results"], args.threshold
+        )
+        for regression in regressions:
+            print("REGRESSION " + regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
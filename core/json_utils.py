@@ -1,4 +1,191 @@
+import hashlib
+import io
 import json
+import os
+import re
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from difflib import SequenceMatcher
+from itertools import compress, islice, repeat
+from json.decoder import scanstring
+from json.encoder import encode_basestring_ascii
+from operator import itemgetter, lt
+from typing import Iterable, Iterator, TextIO
+
+# Approximate number of bytes of memory taken by the cached parsed documents.
+JSON_CACHE_BUDGET = 256 * 1024 * 1024
+# Estimated bytes of memory taken by a parsed document per character of its text.
+# Measured with sys.getsizeof over the benchmark corpora: about 5 for arrays of
+# records, 6 for wide objects and 18 for deeply nested small objects.
+_PARSED_SIZE_FACTOR = 8
+
+# Parsed documents by the content key of their text, least recently used first.
+# An entry is (estimated size of the parsed document in bytes, parsed document,
+# (message, position) of the parse error).
+_parse_cache: "OrderedDict[bytes, tuple[int, object, tuple[str, int] | None]]" = (
+    OrderedDict()
+)
+_parse_cache_size: int = 0
+
+NDJSON_VALIDATE = "validate"
+NDJSON_FORMAT = "format"
+NDJSON_FLATTEN = "flatten"
+# Approximate number of characters of NDJSON records processed as one batch.
+NDJSON_BATCH_SIZE = 1024 * 1024
+# NDJSON texts of at least this many characters are processed by a process pool.
+PARALLEL_NDJSON_THRESHOLD = 8 * 1024 * 1024
+
+# Changed parts of arrays, between the items that occur once in both arrays, with at
+# most this many items in total are aligned by diff_json with difflib to find inserted
+# and removed items, longer ones are compared by index.
+JSON_DIFF_ALIGN_LIMIT = 4_000_000
+
+# Approximate distance in characters between the scanner states kept by JsonEditChecker.
+JSON_CHECKPOINT_INTERVAL = 64 * 1024
+
+# Number of characters read from a file object at once by the streaming functions.
+JSON_CHUNK_SIZE = 1024 * 1024
+# Number of output pieces collected before they are written to the destination.
+_WRITE_PIECES = 8192
+
+# Token kinds, an invalid token is text that does not start any token.
+_INVALID, _PUNCTUATION, _STRING, _NUMBER, _LITERAL = 0, 1, 2, 3, 4
+_TOKEN_PATTERN = re.compile(
+    r"[ \t\n\r]*(?:"
+    r"([{}\[\]:,])"
+    r'|("[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*")'
+    r"|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?)"
+    r"|(true|false|null|NaN|Infinity|-Infinity)"
+    r")"
+)
+# Prefixes of tokens that may continue in the next chunk of a stream.
+_STRING_PREFIX_PATTERN = re.compile(
+    r'"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*'
+    r"(?:\\(?:u[0-9a-fA-F]{0,3})?)?\Z"
+)
+_NUMBER_PREFIX_PATTERN = re.compile(r"-?[0-9]*(?:\.[0-9]*)?(?:[eE][-+]?[0-9]*)?\Z")
+_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+_LITERAL_VALUES = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "NaN": float("nan"),
+    "Infinity": float("inf"),
+    "-Infinity": float("-inf"),
+}
+
+# Validation patterns. Each one consumes a run of at most _VALIDATION_RUN items, which
+# are scalars or containers nested at most two levels deep, and may end with a group of
+# brackets of one kind: closing brackets, or opening brackets (of objects through keys
+# without brackets). The scanner loops once per such run instead of once per token.
+_VALIDATION_RUN = 256
+_WS = r"[ \t\n\r]*+"
+_STRING_VALUE = (
+    r'"[^"\\\x00-\x1f]*+(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*+)*+"'
+)
+_NUMBER_VALUE = r"-?+(?:0|[1-9][0-9]*+)(?:\.[0-9]++)?+(?:[eE][-+]?+[0-9]++)?+"
+# Numbers come before the literals, which the regex engine would otherwise try and
+# reject one by one before every number.
+_SCALAR = (
+    r"(?:" + _STRING_VALUE + "|" + _NUMBER_VALUE + r"|true|false|null|NaN|Infinity"
+    r"|-Infinity)"
+)
+_KEY = _STRING_VALUE + _WS + ":" + _WS
+_SIMPLE_KEY = r'"[^"\\\x00-\x1f\[\]{}]*+"' + _WS + ":" + _WS
+_MORE_ITEMS = "{{0,{}}}+".format(_VALIDATION_RUN - 1)
+_OPEN_RUN = r"(\[(?:{ws}\[)*+|\{{(?:{ws}{key}\{{)*+)".format(ws=_WS, key=_SIMPLE_KEY)
+_CLOSE_ARRAY_RUN = r"(\](?:{ws}\])*+)".format(ws=_WS)
+_CLOSE_OBJECT_RUN = r"(\}}(?:{ws}\}})*+)".format(ws=_WS)
+_OBJECT_CLOSER = ord("}")
+
+
+def _nested_pattern(item: str) -> str:
+    """
+    Returns the pattern of an array or an object of items matched by the item pattern.
+    """
+    return (
+        r"(?:\[{ws}(?:{item}(?:{ws},{ws}{item}){more}{ws})?\]"
+        r"|\{{{ws}(?:{key}{item}(?:{ws},{ws}{key}{item}){more}{ws})?\}})"
+    ).format(ws=_WS, key=_KEY, item=item, more=_MORE_ITEMS)
+
+
+_VALUE = r"(?:{}|{})".format(
+    _SCALAR, _nested_pattern(r"(?:{}|{})".format(_SCALAR, _nested_pattern(_SCALAR)))
+)
+# Runs of numbers, common in large arrays, are matched without the alternatives first,
+# trying the ", " separator json.dumps writes before the general whitespace.
+_ARRAY_REST = (
+    r"(?:(?:, |{ws},{ws}){number}){more}(?:{ws},{ws}{value}){more}"
+    r"(?:{ws}(?:{close}|,{ws}{open}))?+"
+).format(
+    ws=_WS,
+    number=_NUMBER_VALUE,
+    value=_VALUE,
+    more=_MORE_ITEMS,
+    close=_CLOSE_ARRAY_RUN,
+    open=_OPEN_RUN,
+)
+_OBJECT_REST = (
+    r"(?:{ws},{ws}{key}{value}){more}(?:{ws}(?:{close}|,{ws}{key}{open}))?+".format(
+        ws=_WS,
+        key=_KEY,
+        value=_VALUE,
+        more=_MORE_ITEMS,
+        close=_CLOSE_OBJECT_RUN,
+        open=_OPEN_RUN,
+    )
+)
+_ROOT_PATTERN = re.compile(
+    r"{ws}(?:{value}{ws}\Z|{open})".format(ws=_WS, value=_VALUE, open=_OPEN_RUN)
+)
+_END_PATTERN = re.compile(_WS + r"\Z")
+_ARRAY_START_PATTERN = re.compile(
+    r"{ws}(?:{close}|{value}{rest}|{open})".format(
+        ws=_WS, close=_CLOSE_ARRAY_RUN, value=_VALUE, rest=_ARRAY_REST, open=_OPEN_RUN
+    )
+)
+_ARRAY_NEXT_PATTERN = re.compile(_ARRAY_REST)
+_OBJECT_START_PATTERN = re.compile(
+    r"{ws}(?:{close}|{key}(?:{value}{rest}|{open}))".format(
+        ws=_WS,
+        close=_CLOSE_OBJECT_RUN,
+        key=_KEY,
+        value=_VALUE,
+        rest=_OBJECT_REST,
+        open=_OPEN_RUN,
+    )
+)
+_OBJECT_NEXT_PATTERN = re.compile(_OBJECT_REST)
+# Patterns of iter_json_children, which only reads valid documents.
+_WS_PATTERN = re.compile(_WS)
+# Characters outside the Basic Multilingual Plane, which take two UTF-16 code units.
+_ASTRAL_PATTERN = re.compile("[\U00010000-\U0010ffff]")
+_STRING_VALUE_PATTERN = re.compile(_STRING_VALUE)
+_SCALAR_PATTERN = re.compile(_SCALAR)
+_SKIP_TO_BRACKET_PATTERN = re.compile(
+    r'[^"\[\]{}]*+(?:"[^"\\]*+(?:\\.[^"\\]*+)*+"[^"\[\]{}]*+)*+', re.DOTALL
+)
+# Keys written in paths after a dot, other keys are written as ["key"].
+_PLAIN_PATH_KEY_PATTERN = re.compile(r'[^.\[\]"\\\s]++')
+# Values of iter_json_paths, which only reads valid documents: commas and whitespace
+# are skipped, and the key of a member is matched with its value.
+_PATH_TOKEN_PATTERN = re.compile(
+    r"[ \t\n\r,]*+(?:({string}){ws}:{ws})?+(?:([\[{{])|([\]}}])|({string})"
+    r"|(-?+(?:0|[1-9][0-9]*+)(?:\.[0-9]++)?+(?:[eE][-+]?+[0-9]++)?+)"
+    r"|(true|false|null|NaN|Infinity|-Infinity))".format(string=_STRING_VALUE, ws=_WS)
+)
+# Token kinds by the last group of _PATH_TOKEN_PATTERN.
+_PATH_TOKEN_KINDS = (None, None, _PUNCTUATION, _PUNCTUATION, _STRING, _NUMBER, _LITERAL)
+# A path: segments .key (key without the dot at the start), [index] and ["key"].
+_PATH_PATTERN = re.compile(
+    r"(?:(?:{key}|{bracket})(?:\.{key}|{bracket})*+)?".format(
+        key=r'[^.\[\]"\\\s]++', bracket=r'\[(?:0|[1-9][0-9]*+|"(?:[^"\\]|\\.)*+")\]'
+    )
+)
+_PATH_SEGMENT_PATTERN = re.compile(
+    r'\.?+([^.\[\]"\\\s]++)|\[(?:(0|[1-9][0-9]*+)|("(?:[^"\\]|\\.)*+"))\]'
+)
 
 
 def format_json(json_string: str, indentation: int = 4, sort_keys: bool = True) -> str:
@@ -10,8 +197,11 @@ def format_json(json_string: str, indentation: int = 4, sort_keys: bool = True)
     :param sort_keys: Whether to sort the keys in the output. Default is True.
     :return: The formatted JSON string.
     """
-    parsed_json = json.loads(json_string)
+    parsed_json = _parse_json(json_string)
     formatted_json = json.dumps(parsed_json, indent=indentation, sort_keys=sort_keys)
+    if not sort_keys:
+        # The result parses into the same document, keys keep their order.
+        _remember_json(formatted_json, parsed_json)
     return formatted_json
 
 
@@ -19,16 +209,52 @@ def validate_json(json_string: str) -> str:
     """
     Validates a JSON string and returns an error message if it's invalid.
 
+    The parsed document is cached, so formatting or flattening the same string
+    right after validating it does not parse it again. Strings too long to be
+    cached and documents nested too deeply for json.loads are checked with
+    check_json instead.
+
     :param json_string: The JSON string to validate.
     :return: An error message if the JSON string is invalid, otherwise an empty string.
     """
     try:
-        json.loads(json_string)
+        if len(json_string) * _PARSED_SIZE_FACTOR > JSON_CACHE_BUDGET:
+            # The document would not be cached, so it is not built at all. check_json
+            # keeps pace with json.loads on flat number arrays and is faster on
+            # floats, strings and nested documents.
+            check_json(json_string)
+        else:
+            try:
+                _parse_json(json_string)
+            except RecursionError:
+                check_json(json_string)
     except json.JSONDecodeError as e:
         return e.__str__()
     return ""
 
 
+def check_json(json_string: str) -> None:
+    """
+    Checks the syntax of a JSON string without building the document.
+
+    Nested containers are tracked with an explicit stack, so the nesting depth is
+    only limited by memory. Invalid JSON is reported as json.loads reports it.
+
+    :param json_string: The JSON string to check.
+    :raises json.JSONDecodeError: If the JSON string is invalid, as json.loads raises it.
+    """
+    state: tuple[int, bytes, bool] | None = _scan_json(json_string)
+    if state is None:
+        return
+    if json_string.startswith("\ufeff"):
+        raise json.JSONDecodeError(
+            "Unexpected UTF-8 BOM (decode using utf-8-sig)", json_string, 0
+        )
+    error: json.JSONDecodeError | None = _json_error(json_string, state)
+    if error is not None:
+        raise error
+
+
 def flatten_json(json_string: str) -> str:
     """
     Flattens a JSON string by removing all whitespace characters.
@@ -36,6 +262,1574 @@ def flatten_json(json_string: str) -> str:
     :param json_string: The JSON string to flatten.
     :return: The flattened JSON string.
     """
-    parsed_json = json.loads(json_string)
+    parsed_json = _parse_json(json_string)
     flattened_json = json.dumps(parsed_json, separators=(",", ":"))
+    _remember_json(flattened_json, parsed_json)
     return flattened_json
+
+
+def clear_json_cache() -> None:
+    """
+    Drops all parsed documents cached by validate_json, format_json and flatten_json.
+    """
+    global _parse_cache_size
+    _parse_cache.clear()
+    _parse_cache_size = 0
+
+
+def _parse_json(json_string: str) -> object:
+    """
+    Parses a JSON string, reusing the document parsed from an equal string.
+
+    Documents are cached by a blake2b hash of the text, with least recently used
+    documents evicted once their estimated size exceeds JSON_CACHE_BUDGET bytes.
+    Parse errors are cached too, and a new JSONDecodeError is raised every time.
+
+    :param json_string: The JSON string to parse.
+    :return: The parsed document. It is shared, so it must not be modified.
+    :raises json.JSONDecodeError: If the JSON string is invalid.
+    """
+    key: bytes = _content_key(json_string)
+    entry = _parse_cache.get(key)
+    if entry is None:
+        try:
+            entry = (
+                len(json_string) * _PARSED_SIZE_FACTOR,
+                json.loads(json_string),
+                None,
+            )
+        except json.JSONDecodeError as e:
+            entry = (len(json_string) * _PARSED_SIZE_FACTOR, None, (e.msg, e.pos))
+        _store_json(key, entry)
+    else:
+        _parse_cache.move_to_end(key)
+    _, parsed_json, error = entry
+    if error is not None:
+        raise json.JSONDecodeError(error[0], json_string, error[1])
+    return parsed_json
+
+
+def _remember_json(json_string: str, parsed_json: object) -> None:
+    """
+    Caches a document produced by dumping parsed_json as the parse of json_string.
+    """
+    _store_json(
+        _content_key(json_string),
+        (len(json_string) * _PARSED_SIZE_FACTOR, parsed_json, None),
+    )
+
+
+def _store_json(key: bytes, entry: tuple[int, object, tuple[str, int] | None]) -> None:
+    global _parse_cache_size
+    size: int = entry[0]
+    if size > JSON_CACHE_BUDGET:
+        return
+    previous = _parse_cache.pop(key, None)
+    if previous is not None:
+        _parse_cache_size -= previous[0]
+    _parse_cache[key] = entry
+    _parse_cache_size += size
+    while _parse_cache_size > JSON_CACHE_BUDGET:
+        _, evicted = _parse_cache.popitem(last=False)
+        _parse_cache_size -= evicted[0]
+
+
+def _content_key(json_string: str) -> bytes:
+    # surrogatepass keeps lone surrogates, which json.loads accepts, hashable.
+    return hashlib.blake2b(
+        json_string.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+
+
+def reformat_json(
+    source: str | TextIO,
+    destination: TextIO | None = None,
+    indentation: int | None = 4,
+    sort_keys: bool = False,
+    chunk_size: int = JSON_CHUNK_SIZE,
+) -> str | None:
+    """
+    Re-indents or minifies JSON token by token, without building the document.
+
+    The source is read in chunks and every token is written as soon as it is read,
+    so memory does not depend on the size of the document and multi-GB files can
+    be reformatted from file to file. The output is the same as format_json
+    (indentation is an int) or flatten_json (indentation is None) produce, except
+    that duplicate keys are kept. With sort_keys, every object is buffered as
+    text until it is closed to sort its members, and duplicate keys keep their
+    last value as json.loads does; arrays are still streamed.
+
+    :param source: The JSON string or the file object to read.
+    :param destination: The file object to write to. Default is None, which returns the result.
+    :param indentation: The number of spaces to use for indentation, None to minify. Default is 4.
+    :param sort_keys: Whether to sort the keys in the output. Default is False.
+    :param chunk_size: The number of characters to read from a file object at once.
+    :return: The reformatted JSON string if there is no destination, otherwise None.
+    :raises json.JSONDecodeError: If the JSON is invalid.
+    """
+    if destination is None:
+        output = io.StringIO()
+        _reformat(_JsonTokenizer(source, chunk_size), output, indentation, sort_keys)
+        return output.getvalue()
+    _reformat(_JsonTokenizer(source, chunk_size), destination, indentation, sort_keys)
+    return None
+
+
+def reformat_json_file(
+    source_path: str,
+    destination_path: str,
+    indentation: int | None = 4,
+    sort_keys: bool = False,
+) -> None:
+    """
+    Reformats a UTF-8 JSON file into another file with reformat_json.
+
+    :param source_path: The path of the JSON file to read.
+    :param destination_path: The path of the file to write.
+    :param indentation: The number of spaces to use for indentation, None to minify. Default is 4.
+    :param sort_keys: Whether to sort the keys in the output. Default is False.
+    :raises json.JSONDecodeError: If the JSON is invalid.
+    """
+    with open(source_path, "r", encoding="utf-8") as source:
+        with open(destination_path, "w", encoding="utf-8") as destination:
+            reformat_json(source, destination, indentation, sort_keys)
+
+
+def iter_json_paths(json_string: str) -> Iterator[tuple[str, object]]:
+    """
+    Yields the path and the value of every scalar and empty container of a JSON
+    string in the order of the document, e.g. ("a.b[1].c", 1) for {"a": {"b": [0, {"c": 1}]}}.
+
+    Keys are written after dots, or as ["key"] when they are empty or contain dots,
+    brackets, quotes, backslashes or whitespace. The path of the root value is "".
+    The document is read token by token with an explicit stack of the paths of open
+    containers, so it is never built, time is linear in its size and the nesting
+    depth is only limited by memory.
+
+    :param json_string: The JSON string.
+    :return: The iterator of (path, value) pairs.
+    :raises json.JSONDecodeError: If the JSON string is invalid.
+    """
+    check_json(json_string)
+    for path, kind, text in _iter_json_leaves(json_string):
+        if kind == _PUNCTUATION:
+            yield path, {} if text == "{}" else []
+        else:
+            yield path, _json_scalar(kind, text)
+
+
+def flatten_json_paths(json_string: str, indentation: int | None = 4) -> str:
+    """
+    Flattens a JSON string into an object of the paths and the values of its
+    scalars and empty containers, see iter_json_paths.
+
+    :param json_string: The JSON string to flatten.
+    :param indentation: The number of spaces to use for indentation, None to minify. Default is 4.
+    :return: The JSON object of paths, e.g. {"a.b[3].c": 1}.
+    :raises json.JSONDecodeError: If the JSON string is invalid.
+    """
+    check_json(json_string)
+    separator: str = ",\n" + " " * indentation if indentation is not None else ","
+    key_separator: str = ":" if indentation is None else ": "
+    pieces: list[str] = [
+        encode_basestring_ascii(path)
+        + key_separator
+        + (text if kind == _PUNCTUATION else _normalize_scalar(kind, text))
+        for path, kind, text in _iter_json_leaves(json_string)
+    ]
+    if indentation is None:
+        return "{" + separator.join(pieces) + "}"
+    return "{\n" + " " * indentation + separator.join(pieces) + "\n}"
+
+
+def unflatten_json_paths(
+    source: str | Iterable[tuple[str, object]],
+    indentation: int | None = 4,
+    sort_keys: bool = False,
+) -> str:
+    """
+    Builds the JSON document of paths and values, the inverse of flatten_json_paths
+    and iter_json_paths.
+
+    Paths may come in any order. A value may not be the value of one path and the
+    container of another one, e.g. {"a": {}, "a.b": 1}, and values are never modified.
+    The document is built without recursion and written with dump_json, so the
+    nesting depth is only limited by memory.
+
+    :param source: The JSON object of paths, or an iterable of (path, value) pairs.
+    :param indentation: The number of spaces to use for indentation, None to minify. Default is 4.
+    :param sort_keys: Whether to sort the keys in the output. Default is False.
+    :return: The JSON string of the document, "{}" if there are no paths.
+    :raises json.JSONDecodeError: If the source is an invalid JSON string.
+    :raises JsonPathIsInvalidException: If a path is invalid, conflicts with another
+                                        one or an array misses an item.
+    """
+    if isinstance(source, str):
+        flat_json = json.loads(source)
+        if not isinstance(flat_json, dict):
+            raise JsonPathIsInvalidException("The JSON of paths must be an object")
+        source = flat_json.items()
+    root: _KeyedItems = _KeyedItems()
+    # Arrays with their containers and keys, every array after its container.
+    arrays: list[tuple[dict, str | int | None, _IndexedItems]] = []
+    for path, value in source:
+        container: dict = root
+        key: str | int | None = None
+        for segment in _parse_json_path(path):
+            child = container.get(key, root)
+            if child is root:
+                if isinstance(segment, int):
+                    child = _IndexedItems()
+                    arrays.append((container, key, child))
+                else:
+                    child = _KeyedItems()
+                container[key] = child
+            elif type(child) is not (
+                _IndexedItems if isinstance(segment, int) else _KeyedItems
+            ):
+                # A value of another path, or a container of the other kind.
+                raise JsonPathIsInvalidException(
+                    "Path {} conflicts with another path".format(path)
+                )
+            container, key = child, segment
+        if key in container:
+            raise JsonPathIsInvalidException(
+                "Path {} conflicts with another path".format(path)
+            )
+        container[key] = value
+    if None not in root:
+        return "{}"
+    for container, key, items in reversed(arrays):
+        if max(items) != len(items) - 1:
+            raise JsonPathIsInvalidException(
+                "An item of an array before index {} has no path".format(len(items))
+            )
+        container[key] = list(map(items.__getitem__, range(len(items))))
+    return dump_json(root[None], indentation, sort_keys)
+
+
+def dump_json(
+    document: object, indentation: int | None = 4, sort_keys: bool = False
+) -> str:
+    """
+    Writes a document with json.dumps, or token by token with an explicit stack
+    when it is nested too deeply for json.dumps, so the nesting depth is only
+    limited by memory.
+
+    :param document: The document of dicts, lists and scalars to write.
+    :param indentation: The number of spaces to use for indentation, None to minify. Default is 4.
+    :param sort_keys: Whether to sort the keys in the output. Default is False.
+    :return: The JSON string of the document.
+    """
+    try:
+        if indentation is None:
+            return json.dumps(document, separators=(",", ":"), sort_keys=sort_keys)
+        return json.dumps(document, indent=indentation, sort_keys=sort_keys)
+    except RecursionError:
+        # Too deep for json.dumps, written with an explicit stack instead.
+        output = io.StringIO()
+        _reformat(_TreeTokens(document), output, indentation, sort_keys)
+        return output.getvalue()
+
+
+def _iter_json_leaves(json_string: str) -> Iterator[tuple[str, int, str]]:
+    """
+    Yields the path, the token kind and the token text of every scalar of a valid
+    JSON string, and of every empty container as a punctuation token "{}" or "[]".
+    """
+    # Frames of open containers: [path, number of items, whether it is an object].
+    stack: list[list] = []
+    # Path suffixes of the keys read so far, by the key text.
+    key_paths: dict[str, str] = {}
+    kinds: tuple = _PATH_TOKEN_KINDS
+    for match in _PATH_TOKEN_PATTERN.finditer(json_string):
+        group: int = match.lastindex
+        if group == 3:
+            frame: list = stack.pop()
+            if not frame[1]:
+                yield frame[0], _PUNCTUATION, "{}" if frame[2] else "[]"
+            continue
+        # A value: its path is the path of its container and its key or index.
+        if not stack:
+            path: str = ""
+        else:
+            frame = stack[-1]
+            if frame[2]:
+                key_text: str = match.group(1)
+                key_path: str | None = key_paths.get(key_text)
+                if key_path is None:
+                    key_path = _json_path_key(scanstring(key_text, 1)[0])
+                    key_paths[key_text] = key_path
+                if frame[0]:
+                    path = frame[0] + key_path
+                else:
+                    path = key_path[1:] if key_path[0] == "." else key_path
+            else:
+                path = f"{frame[0]}[{frame[1]}]"
+            frame[1] += 1
+        if group == 2:
+            stack.append([path, 0, match.group(2) == "{"])
+        else:
+            yield path, kinds[group], match.group(group)
+
+
+def _json_scalar(kind: int, text: str) -> object:
+    """
+    Returns the value of a string, number or literal token as json.loads parses it.
+    """
+    if kind == _STRING:
+        return scanstring(text, 1)[0]
+    if kind == _NUMBER:
+        if "." in text or "e" in text or "E" in text:
+            return float(text)
+        return int(text)
+    return _LITERAL_VALUES[text]
+
+
+def _json_path_key(key: str) -> str:
+    """
+    Returns the segment of a path for a key: .key, or ["key"] for other keys.
+    """
+    if _PLAIN_PATH_KEY_PATTERN.fullmatch(key):
+        return "." + key
+    return "[" + json.dumps(key, ensure_ascii=False) + "]"
+
+
+def _parse_json_path(path: str) -> list[str | int]:
+    """
+    Returns the keys and the indexes of a path written by iter_json_paths.
+    """
+    if _PATH_PATTERN.fullmatch(path) is None:
+        raise JsonPathIsInvalidException("Path {} is invalid".format(path))
+    segments: list[str | int] = []
+    for key, index, quoted_key in _PATH_SEGMENT_PATTERN.findall(path):
+        if key:
+            segments.append(key)
+        elif index:
+            segments.append(int(index))
+        else:
+            try:
+                segments.append(scanstring(quoted_key, 1)[0])
+            except json.JSONDecodeError:
+                raise JsonPathIsInvalidException(
+                    "Path {} has an invalid key {}".format(path, quoted_key)
+                )
+    return segments
+
+
+class _IndexedItems(dict):
+    """
+    The items of an array built by unflatten_json_paths, by their indexes.
+    """
+
+
+class _KeyedItems(dict):
+    """
+    The members of an object built by unflatten_json_paths, unlike objects
+    that are values of paths.
+    """
+
+
+class _TreeTokens:
+    """
+    The tokens of a document of dicts, lists and scalars, for _reformat.
+
+    The document is walked with an explicit stack of the item iterators of
+    open containers.
+    """
+
+    def __init__(self, document: object) -> None:
+        self._document: object = document
+        self.position: int = 0
+
+    def __iter__(self) -> Iterator[tuple[int, str, int]]:
+        # Frames of open containers: [items iterator, closing bracket, number of items].
+        stack: list[list] = [[iter(((None, self._document),)), None, 0]]
+        while stack:
+            frame: list = stack[-1]
+            item: tuple | None = next(frame[0], None)
+            if item is None:
+                stack.pop()
+                if frame[1] is not None:
+                    yield _PUNCTUATION, frame[1], 0
+                continue
+            if frame[2]:
+                yield _PUNCTUATION, ",", 0
+            frame[2] += 1
+            key, value = item
+            if key is not None:
+                yield _STRING, encode_basestring_ascii(key), 0
+                yield _PUNCTUATION, ":", 0
+            if isinstance(value, dict):
+                yield _PUNCTUATION, "{", 0
+                stack.append([iter(value.items()), "}", 0])
+            elif isinstance(value, (list, tuple)):
+                yield _PUNCTUATION, "[", 0
+                stack.append([zip(repeat(None), value), "]", 0])
+            elif isinstance(value, str):
+                yield _STRING, encode_basestring_ascii(value), 0
+            else:
+                text: str = json.dumps(value)
+                yield _LITERAL if text in _LITERALS else _NUMBER, text, 0
+
+    def error(self, message: str, position: int) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, "", position)
+
+
+def diff_json(old_json: str, new_json: str) -> list[dict]:
+    """
+    Compares two JSON documents structurally and returns the JSON Patch (RFC 6902)
+    operations that turn the old document into the new one.
+
+    Every container of both documents gets a hash, computed once, bottom-up, from its
+    keys and the types and values of its items, with nested containers replaced by
+    their hashes (a Merkle tree), which takes linear time whatever the nesting depth.
+    Scalars are compared by their type and value, so true, 1 and 1.0 differ while 0.0
+    and -0.0 are equal. The documents are then walked top-down from the root: values
+    are equal when their hashes match and they compare equal, which rules out hash
+    collisions, equal branches are skipped and only different ones are entered. Documents nested too deeply
+    for json.loads are parsed with an explicit stack.
+
+    Changed objects yield "remove" operations of their keys in the old order, then
+    "add" operations in the new order; objects that only differ in key order yield
+    none. Changed arrays are aligned on the items that occur once in both of them
+    (as patience diff does), and the parts between these items are aligned with
+    difflib to find inserted and removed items, see JSON_DIFF_ALIGN_LIMIT. Other
+    changed values are replaced.
+
+    :param old_json: The JSON string of the old document.
+    :param new_json: The JSON string of the new document.
+    :return: The list of operations, e.g. [{"op": "replace", "path": "/a/0", "value": 1}],
+             empty when the documents are equal.
+    :raises json.JSONDecodeError: If a JSON string is invalid.
+    """
+    if old_json == new_json:
+        check_json(old_json)
+        return []
+    old_document: object = _load_json(old_json)
+    new_document: object = _load_json(new_json)
+    # Hashes of the containers of both documents, which are alive during the walk.
+    hashes: dict[int, int] = {}
+    _hash_json(old_document, hashes)
+    _hash_json(new_document, hashes)
+    if _json_key(old_document, hashes) == _json_key(
+        new_document, hashes
+    ) and _json_equal(old_document, new_document):
+        return []
+    operations: list[dict] = []
+    # Pairs of different values with the JSON Pointer of the value in the new document.
+    pending: list[tuple[str, object, object]] = [("", old_document, new_document)]
+    while pending:
+        pointer, old, new = pending.pop()
+        if type(old) is not type(new):
+            operations.append({"op": "replace", "path": pointer, "value": new})
+        elif type(old) is dict:
+            for key in old:
+                if key not in new:
+                    path: str = _json_pointer(pointer, key)
+                    operations.append({"op": "remove", "path": path})
+            for key, value in new.items():
+                path = _json_pointer(pointer, key)
+                if key not in old:
+                    operations.append({"op": "add", "path": path, "value": value})
+                elif _json_key(old[key], hashes) != _json_key(
+                    value, hashes
+                ) or not _json_equal(old[key], value):
+                    pending.append((path, old[key], value))
+        elif type(old) is list:
+            _diff_json_arrays(pointer, old, new, hashes, operations, pending)
+        else:
+            operations.append({"op": "replace", "path": pointer, "value": new})
+    return operations
+
+
+def _load_json(json_string: str) -> object:
+    """
+    Parses a JSON string with json.loads, or token by token with an explicit stack
+    when it is nested too deeply for json.loads.
+    """
+    try:
+        return json.loads(json_string)
+    except RecursionError:
+        pass
+    check_json(json_string)
+    document: object = None
+    # Open containers, the innermost one last.
+    stack: list[dict | list] = []
+    kinds: tuple = _PATH_TOKEN_KINDS
+    for match in _PATH_TOKEN_PATTERN.finditer(json_string):
+        group: int = match.lastindex
+        if group == 3:
+            stack.pop()
+            continue
+        if group == 2:
+            value: object = {} if match.group(2) == "{" else []
+        else:
+            value = _json_scalar(kinds[group], match.group(group))
+        if not stack:
+            document = value
+        elif type(stack[-1]) is dict:
+            stack[-1][scanstring(match.group(1), 1)[0]] = value
+        else:
+            stack[-1].append(value)
+        if group == 2:
+            stack.append(value)
+    return document
+
+
+def _hash_json(document: object, hashes: dict[int, int]) -> None:
+    """
+    Adds the hashes of all containers of a document to hashes by their ids.
+
+    The containers are listed parents first with an explicit stack and hashed in
+    reverse, so the items of every container are hashed before it.
+    """
+    is_container = {dict, list}.__contains__
+    if not is_container(type(document)):
+        return
+    containers: list[dict | list] = []
+    stack: list[dict | list] = [document]
+    while stack:
+        container = stack.pop()
+        containers.append(container)
+        values = container.values() if type(container) is dict else container
+        stack.extend(compress(values, map(is_container, map(type, values))))
+    get_hash = hashes.get
+    for container in reversed(containers):
+        # The keys, the types of the items and their hashes or values, in order.
+        if type(container) is dict:
+            values = container.values()
+            items: tuple = (
+                *container,
+                *map(type, values),
+                *map(get_hash, map(id, values), values),
+            )
+        else:
+            items = (
+                *map(type, container),
+                *map(get_hash, map(id, container), container),
+            )
+        hashes[id(container)] = hash(items)
+
+
+def _json_key(value: object, hashes: dict[int, int]) -> tuple:
+    """
+    Returns the key diff_json compares a value by: its type, and the hash of
+    a container or the value of a scalar.
+    """
+    return type(value), hashes.get(id(value), value)
+
+
+def _json_equal(old: object, new: object) -> bool:
+    """
+    Returns whether two values with equal keys (see _json_key) are equal, which rules
+    out the collisions of hashes, e.g. hash(-1) == hash(-2). The types of nested
+    values, which == does not compare, are already covered by the hashes.
+    """
+    try:
+        return old == new
+    except RecursionError:
+        pass
+    stack: list[tuple[object, object]] = [(old, new)]
+    while stack:
+        old, new = stack.pop()
+        if type(old) is not type(new):
+            return False
+        if type(old) is dict:
+            if old.keys() != new.keys():
+                return False
+            stack.extend(zip(old.values(), map(new.__getitem__, old)))
+        elif type(old) is list:
+            if len(old) != len(new):
+                return False
+            stack.extend(zip(old, new))
+        elif old != new:
+            return False
+    return True
+
+
+def _json_keys(values: list, hashes: dict[int, int]) -> list[tuple]:
+    """
+    Returns the keys of the items of an array, see _json_key.
+    """
+    return list(zip(map(type, values), map(hashes.get, map(id, values), values)))
+
+
+def _json_pointer(pointer: str, key: str) -> str:
+    """
+    Returns the JSON Pointer (RFC 6901) of a member of the object at the pointer.
+    """
+    return pointer + "/" + key.replace("~", "~0").replace("/", "~1")
+
+
+def _diff_json_arrays(
+    pointer: str,
+    old: list,
+    new: list,
+    hashes: dict[int, int],
+    operations: list[dict],
+    pending: list[tuple[str, object, object]],
+) -> None:
+    """
+    Adds the operations of two different arrays, see _align_json_arrays.
+
+    Operations are added from the first item to the last one and point to the
+    positions of the new items, so every operation applies to the result of the
+    previous ones. Pairs of different items are added to pending.
+    """
+    old_keys: list[tuple] = _json_keys(old, hashes)
+    new_keys: list[tuple] = _json_keys(new, hashes)
+    changes: list[tuple[int, int, int, int]] = _align_json_arrays(old_keys, new_keys)
+    changes.append((len(old), len(old), len(new), len(new)))
+    old_position, new_position = 0, 0
+    for old_start, old_stop, new_start, new_stop in changes:
+        # The items between the changes have equal keys, but may still differ.
+        count: int = old_start - old_position
+        if not _json_equal(
+            old[old_position:old_start], new[new_position : new_position + count]
+        ):
+            _pair_json_items(
+                pointer, old, new, (old_position, new_position, count), hashes, pending
+            )
+        paired: int = min(old_stop - old_start, new_stop - new_start)
+        _pair_json_items(
+            pointer, old, new, (old_start, new_start, paired), hashes, pending
+        )
+        removed_pointer: str = "{}/{}".format(pointer, new_start + paired)
+        for _ in range(old_stop - old_start - paired):
+            operations.append({"op": "remove", "path": removed_pointer})
+        for index in range(new_start + paired, new_stop):
+            path: str = "{}/{}".format(pointer, index)
+            operations.append({"op": "add", "path": path, "value": new[index]})
+        old_position, new_position = old_stop, new_stop
+
+
+def _pair_json_items(
+    pointer: str,
+    old: list,
+    new: list,
+    span: tuple[int, int, int],
+    hashes: dict[int, int],
+    pending: list[tuple[str, object, object]],
+) -> None:
+    """
+    Adds the pairs of different items of two arrays to pending, from the (old start,
+    new start, count) span.
+    """
+    old_start, new_start, count = span
+    for offset in range(count):
+        old_item: object = old[old_start + offset]
+        new_item: object = new[new_start + offset]
+        if _json_key(old_item, hashes) != _json_key(
+            new_item, hashes
+        ) or not _json_equal(old_item, new_item):
+            path: str = "{}/{}".format(pointer, new_start + offset)
+            pending.append((path, old_item, new_item))
+
+
+def _align_json_arrays(
+    old_keys: list[tuple], new_keys: list[tuple]
+) -> list[tuple[int, int, int, int]]:
+    """
+    Returns the (old start, old stop, new start, new stop) ranges of the changed
+    items of two arrays, in order.
+
+    The items the arrays start and end with are skipped. In the middle part, the
+    items that occur once in each array are matched, and the longest sequence of
+    matches that is in the same order in both arrays is kept (as patience diff
+    does), which takes O(n log n). The parts between the kept matches are aligned
+    with difflib when they are short enough, otherwise they are compared by index.
+    """
+    start: int = 0
+    old_end, new_end = len(old_keys), len(new_keys)
+    while start < old_end and start < new_end and old_keys[start] == new_keys[start]:
+        start += 1
+    while (
+        old_end > start
+        and new_end > start
+        and old_keys[old_end - 1] == new_keys[new_end - 1]
+    ):
+        old_end -= 1
+        new_end -= 1
+    old_middle: list[tuple] = old_keys[start:old_end]
+    new_middle: list[tuple] = new_keys[start:new_end]
+    old_counts: Counter = Counter(old_middle)
+    new_counts: Counter = Counter(new_middle)
+    new_positions: dict[tuple, int] = {
+        key: position
+        for position, key in enumerate(new_middle, start)
+        if new_counts[key] == 1
+    }
+    matches: list[tuple[int, int]] = [
+        (position, new_positions[key])
+        for position, key in enumerate(old_middle, start)
+        if old_counts[key] == 1 and key in new_positions
+    ]
+    ranges: list[tuple[int, int, int, int]] = []
+    old_position, new_position = start, start
+    for old_match, new_match in _ordered_matches(matches) + [(old_end, new_end)]:
+        size: int = old_match - old_position + new_match - new_position
+        if old_match == old_position or new_match == new_position:
+            if old_match > old_position or new_match > new_position:
+                ranges.append((old_position, old_match, new_position, new_match))
+        elif size > JSON_DIFF_ALIGN_LIMIT:
+            ranges.append((old_position, old_match, new_position, new_match))
+        else:
+            matcher = SequenceMatcher(
+                None,
+                old_keys[old_position:old_match],
+                new_keys[new_position:new_match],
+            )
+            for tag, old_start, old_stop, new_start, new_stop in matcher.get_opcodes():
+                if tag != "equal":
+                    ranges.append(
+                        (
+                            old_position + old_start,
+                            old_position + old_stop,
+                            new_position + new_start,
+                            new_position + new_stop,
+                        )
+                    )
+        old_position, new_position = old_match + 1, new_match + 1
+    return ranges
+
+
+def _ordered_matches(matches: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Returns the longest subsequence of (old position, new position) matches, which
+    are ordered by the old positions, whose new positions increase too.
+    """
+    new_positions: list[int] = list(map(itemgetter(1), matches))
+    if all(map(lt, new_positions, islice(new_positions, 1, None))):
+        return matches
+    # Patience sorting: tails[k] is the index of the match that ends the increasing
+    # subsequence of length k + 1 with the smallest new position found so far.
+    tail_positions: list[int] = []
+    tails: list[int] = []
+    previous: list[int] = []
+    for index, new_position in enumerate(new_positions):
+        length: int = bisect_left(tail_positions, new_position)
+        previous.append(tails[length - 1] if length else -1)
+        if length == len(tails):
+            tail_positions.append(new_position)
+            tails.append(index)
+        else:
+            tail_positions[length] = new_position
+            tails[length] = index
+    ordered: list[tuple[int, int]] = []
+    index = tails[-1]
+    while index >= 0:
+        ordered.append(matches[index])
+        index = previous[index]
+    ordered.reverse()
+    return ordered
+
+
+class JsonEditChecker:
+    """
+    Checks the syntax of a JSON document again and again while it is edited.
+
+    A valid document is scanned as check_json does, and the state of the scanner
+    is kept about every JSON_CHECKPOINT_INTERVAL characters. After an edit of a
+    valid document, the scan resumes from the last state before the edit and
+    stops at the first state after the edit that is the same as before, because
+    the rest of the document is unchanged and was valid. So a small edit of a
+    large document is checked in time proportional to JSON_CHECKPOINT_INTERVAL.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the JsonEditChecker object.
+        """
+        # The length of the last checked text when it was valid, otherwise None.
+        self._length: int | None = None
+        # The length of the last text checked with utf16 in UTF-16 code units.
+        self._utf16_length: int | None = None
+        self._checkpoints: dict[int, tuple[bytes, bool]] = {}
+
+    def check(
+        self,
+        json_string: str,
+        edit: tuple[int, int, int] | None = None,
+        utf16: bool = False,
+    ) -> None:
+        """
+        Checks the syntax of a JSON string.
+
+        :param json_string: The JSON string to check.
+        :param edit: (position, removed, added) of the edit that turned the previously
+                     checked text into this one, see merge_edits. Default is None,
+                     which checks the whole text.
+        :param utf16: Whether the edit counts UTF-16 code units, as the positions of
+                      Qt do, instead of characters. Default is False.
+        :raises json.JSONDecodeError: If the JSON string is invalid, as json.loads raises it.
+        """
+        if utf16:
+            astral: list[int] = [
+                match.start() for match in _ASTRAL_PATTERN.finditer(json_string)
+            ]
+            if edit is not None:
+                edit = self._code_point_edit(json_string, edit, astral)
+            self._utf16_length = len(json_string) + len(astral)
+        else:
+            self._utf16_length = None
+        checkpoints: dict[int, tuple[bytes, bool]] = {}
+        state: tuple[int, bytes, bool] | None = self._scan(
+            json_string, edit, checkpoints
+        )
+        self._length, self._checkpoints = None, {}
+        if state is not None:
+            if json_string.startswith("\ufeff"):
+                # Raises the error of the byte order mark.
+                check_json(json_string)
+            error: json.JSONDecodeError | None = _json_error(json_string, state)
+            if error is not None:
+                raise error
+            checkpoints = {}
+        self._length, self._checkpoints = len(json_string), checkpoints
+
+    def _code_point_edit(
+        self, json_string: str, edit: tuple[int, int, int], astral: list[int]
+    ) -> tuple[int, int, int] | None:
+        """
+        Returns an edit of UTF-16 code units in characters, or None when it does not
+        fit the previously checked text. astral has the positions of the characters
+        that take two code units in the JSON string.
+        """
+        position, removed, added = edit
+        if (
+            self._length is None
+            or self._utf16_length is None
+            or self._utf16_length - removed + added != len(json_string) + len(astral)
+        ):
+            return None
+        # The text before the edit is unchanged, so its characters are those of the
+        # JSON string, and the removed ones are the difference of the lengths.
+        start: int = _code_point_offset(astral, position)
+        end: int = _code_point_offset(astral, position + added)
+        return start, self._length - len(json_string) + end - start, end - start
+
+    def _scan(
+        self,
+        json_string: str,
+        edit: tuple[int, int, int] | None,
+        checkpoints: dict[int, tuple[bytes, bool]],
+    ) -> tuple[int, bytes, bool] | None:
+        """
+        Scans the JSON string from the last checkpoint before the edit, or from
+        its start when the previous text was invalid or the edit does not fit it.
+        """
+        if (
+            edit is None
+            or self._length is None
+            or self._length - edit[1] + edit[2] != len(json_string)
+        ):
+            return _scan_json(json_string, checkpoints)
+        position, removed, added = edit
+        resume: int | None = None
+        for checkpoint, state in self._checkpoints.items():
+            if checkpoint > position:
+                break
+            checkpoints[checkpoint] = state
+            resume = checkpoint
+        sync = (position + added, added - removed, self._checkpoints)
+        if resume is None:
+            return _scan_json(json_string, checkpoints, sync)
+        stack, opened = self._checkpoints[resume]
+        return _scan_containers(
+            json_string, resume, bytearray(stack), opened, checkpoints, sync
+        )
+
+
+def _code_point_offset(astral: list[int], offset: int) -> int:
+    """
+    Returns the character position at an offset in UTF-16 code units of a string,
+    given the positions of its characters that take two code units.
+    """
+    position: int = offset
+    for astral_position in astral:
+        if astral_position >= position:
+            break
+        position -= 1
+    return position
+
+
+def merge_edits(
+    edit: tuple[int, int, int] | None, position: int, removed: int, added: int
+) -> tuple[int, int, int]:
+    """
+    Combines a pending edit of a text with the next one into one edit of the original
+    text, e.g. for the contentsChange signals of a QTextDocument between two checks.
+
+    :param edit: (position, removed, added) of the pending edit, or None if there is none.
+    :param position: The position of the next edit in the edited text.
+    :param removed: The number of characters the next edit removed.
+    :param added: The number of characters the next edit added.
+    :return: (position, removed, added) of the combined edit of the original text.
+    """
+    if edit is None:
+        return position, removed, added
+    start, pending_removed, pending_added = edit
+    merged_start: int = min(start, position)
+    merged_end: int = max(start + pending_added, position + removed)
+    return (
+        merged_start,
+        merged_end - pending_added + pending_removed - merged_start,
+        merged_end - removed + added - merged_start,
+    )
+
+
+def process_ndjson(
+    ndjson_string: str,
+    mode: str = NDJSON_VALIDATE,
+    indentation: int = 4,
+    sort_keys: bool = True,
+    workers: int | None = None,
+) -> tuple[str, list[tuple[int, str]]]:
+    """
+    Validates, formats or flattens every record of newline-delimited JSON (JSON Lines).
+
+    Every non-blank line is an independent record. The text is cut into batches of
+    about NDJSON_BATCH_SIZE characters at line breaks, and texts of at least
+    PARALLEL_NDJSON_THRESHOLD characters are processed by a pool of worker
+    processes. At most two batches per worker are in flight, and results are
+    collected in the order of the batches.
+
+    :param ndjson_string: The newline-delimited JSON string.
+    :param mode: One of NDJSON_VALIDATE, NDJSON_FORMAT or NDJSON_FLATTEN. Default is NDJSON_VALIDATE.
+    :param indentation: The number of spaces to use for indentation with NDJSON_FORMAT. Default is 4.
+    :param sort_keys: Whether to sort the keys in the output with NDJSON_FORMAT. Default is True.
+    :param workers: The number of worker processes. Default is the number of CPUs.
+    :return: The processed records separated by line breaks (empty with NDJSON_VALIDATE),
+             where invalid records are kept as they are, and the list of
+             (line number, error message) of the invalid records.
+    :raises NdjsonModeIsNotSupportedException: If the mode is not supported.
+    """
+    if mode not in [NDJSON_VALIDATE, NDJSON_FORMAT, NDJSON_FLATTEN]:
+        raise NdjsonModeIsNotSupportedException(
+            "Mode {} is not supported. Use {}, {} or {}".format(
+                mode, NDJSON_VALIDATE, NDJSON_FORMAT, NDJSON_FLATTEN
+            )
+        )
+    workers = workers or os.cpu_count() or 1
+    batches: Iterator[tuple[str, int]] = _ndjson_batches(ndjson_string)
+    if workers > 1 and len(ndjson_string) >= PARALLEL_NDJSON_THRESHOLD:
+        results: Iterator[tuple[str, list[tuple[int, str]]]] = _process_ndjson_batches(
+            batches, mode, indentation, sort_keys, workers
+        )
+    else:
+        results = (
+            _process_ndjson_batch(batch, first_line, mode, indentation, sort_keys)
+            for batch, first_line in batches
+        )
+
+    outputs: list[str] = []
+    errors: list[tuple[int, str]] = []
+    for output, batch_errors in results:
+        if output:
+            outputs.append(output)
+        errors.extend(batch_errors)
+    return "\n".join(outputs), errors
+
+
+def _ndjson_batches(ndjson_string: str) -> Iterator[tuple[str, int]]:
+    """
+    Yields (batch, number of its first line) for slices of the text that end with line breaks.
+    """
+    start: int = 0
+    line_number: int = 1
+    while start < len(ndjson_string):
+        end: int = ndjson_string.find("\n", start + NDJSON_BATCH_SIZE)
+        end = len(ndjson_string) if end < 0 else end + 1
+        batch: str = ndjson_string[start:end]
+        yield batch, line_number
+        line_number += batch.count("\n")
+        start = end
+
+
+def _process_ndjson_batches(
+    batches: Iterator[tuple[str, int]],
+    mode: str,
+    indentation: int,
+    sort_keys: bool,
+    workers: int,
+) -> Iterator[tuple[str, list[tuple[int, str]]]]:
+    """
+    Processes batches in worker processes and yields their results in order.
+    """
+    pending: deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch, first_line in batches:
+            pending.append(
+                executor.submit(
+                    _process_ndjson_batch,
+                    batch,
+                    first_line,
+                    mode,
+                    indentation,
+                    sort_keys,
+                )
+            )
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _process_ndjson_batch(
+    batch: str, first_line: int, mode: str, indentation: int, sort_keys: bool
+) -> tuple[str, list[tuple[int, str]]]:
+    """
+    Processes the records of a batch, in a worker process or in this one.
+
+    :return: The processed records separated by line breaks and the errors of the batch.
+    """
+    output: list[str] = []
+    errors: list[tuple[int, str]] = []
+    for line_number, line in enumerate(batch.split("\n"), first_line):
+        if not line.strip(" \t\r"):
+            continue
+        try:
+            if mode == NDJSON_VALIDATE:
+                check_json(line)
+                continue
+            parsed_json = json.loads(line)
+        except json.JSONDecodeError as e:
+            errors.append((line_number, "{}: column {}".format(e.msg, e.colno)))
+            output.append(line)
+            continue
+        if mode == NDJSON_FORMAT:
+            output.append(
+                json.dumps(parsed_json, indent=indentation, sort_keys=sort_keys)
+            )
+        else:
+            output.append(json.dumps(parsed_json, separators=(",", ":")))
+    if mode == NDJSON_VALIDATE:
+        return "", errors
+    return "\n".join(output), errors
+
+
+def iter_json_children(
+    json_string: str, position: int = 0
+) -> Iterator[tuple[str | None, int, int]]:
+    """
+    Yields the spans of the members of an object or the items of an array in a JSON
+    string, without decoding or building the values.
+
+    Nested values are skipped by counting brackets outside of strings, so every
+    child costs about one regular expression match per bracket it contains, and
+    the spans can be passed back to read the children of a child.
+
+    :param json_string: The JSON string. It must be valid, see check_json.
+    :param position: The position of the object or the array (or of the whitespace before it).
+    :return: The iterator of (key, start, end) of the children, where key is None
+             for array items, and json_string[start:end] is the JSON text of the value.
+             Scalars have no children.
+    """
+    skip_whitespace = _WS_PATTERN.match
+    position = skip_whitespace(json_string, position).end()
+    opener: str = json_string[position : position + 1]
+    if opener != "{" and opener != "[":
+        return
+    closer: str = "}" if opener == "{" else "]"
+    position = skip_whitespace(json_string, position + 1).end()
+    while json_string[position] != closer:
+        key: str | None = None
+        if opener == "{":
+            key, position = scanstring(json_string, position + 1)
+            # Skips the whitespace around the ':' delimiter.
+            position = skip_whitespace(json_string, position).end() + 1
+            position = skip_whitespace(json_string, position).end()
+        end: int = _json_value_end(json_string, position)
+        yield key, position, end
+        position = skip_whitespace(json_string, end).end()
+        if json_string[position] == ",":
+            position = skip_whitespace(json_string, position + 1).end()
+
+
+def _json_value_end(json_string: str, start: int) -> int:
+    """
+    Returns the end of the valid JSON value that starts at the position.
+    """
+    first: str = json_string[start]
+    if first == '"':
+        return _STRING_VALUE_PATTERN.match(json_string, start).end()
+    if first != "{" and first != "[":
+        return _SCALAR_PATTERN.match(json_string, start).end()
+    skip_to_bracket = _SKIP_TO_BRACKET_PATTERN.match
+    depth: int = 0
+    position: int = start
+    while True:
+        position = skip_to_bracket(json_string, position).end()
+        depth += 1 if json_string[position] in "[{" else -1
+        position += 1
+        if depth == 0:
+            return position
+
+
+def _scan_json(
+    json_string: str,
+    checkpoints: "dict[int, tuple[bytes, bool]] | None" = None,
+    sync: "tuple[int, int, dict[int, tuple[bytes, bool]]] | None" = None,
+) -> tuple[int, bytes, bool] | None:
+    """
+    Checks whether a JSON string is valid.
+
+    :param json_string: The JSON string.
+    :param checkpoints: The dict to save scanner states into, see _scan_containers.
+    :param sync: The states of a previous scan to stop at, see _scan_containers.
+    :return: None if the JSON string is valid, otherwise the last valid scanner state
+             (position, stack, opened) before the error, see _json_error.
+    """
+    match = _ROOT_PATTERN.match(json_string)
+    if match is None:
+        return 0, b"", False
+    if match.lastindex is None:
+        # A scalar or a shallow document, matched to the end.
+        return None
+    position: int = match.end()
+    bracket: str = json_string[position - 1]
+    run: int = json_string.count(bracket, match.start(match.lastindex), position)
+    stack: bytearray = bytearray(b"}" * run if bracket == "{" else b"]" * run)
+    return _scan_containers(json_string, position, stack, True, checkpoints, sync)
+
+
+def _scan_containers(
+    json_string: str,
+    position: int,
+    stack: bytearray,
+    opened: bool,
+    checkpoints: "dict[int, tuple[bytes, bool]] | None" = None,
+    sync: "tuple[int, int, dict[int, tuple[bytes, bool]]] | None" = None,
+) -> tuple[int, bytes, bool] | None:
+    """
+    Checks whether the rest of a JSON string is valid, starting from a scanner state.
+
+    The stack of open containers is a bytearray of their closing brackets, so runs
+    of brackets are pushed and popped at once and no Python objects are created
+    per container or per token.
+
+    :param json_string: The JSON string.
+    :param position: The position to scan from.
+    :param stack: The closing brackets of the containers open at the position.
+    :param opened: Whether the text before the position ends with an opening bracket.
+    :param checkpoints: The dict to save the state of the scanner into about every
+                        JSON_CHECKPOINT_INTERVAL characters, as {position: (stack, opened)}.
+    :param sync: (position, shift, checkpoints) of a previous scan of the same text
+                 before an edit: from the position on, the text is the previous text
+                 shifted by shift. The scan stops as valid at the first state equal to
+                 a previous one, whose later checkpoints are then shifted into checkpoints.
+    :return: None if the rest is valid, otherwise the last valid state (position, stack, opened).
+    """
+    end_of_text: int = len(json_string) + 1
+    next_checkpoint: int = (
+        end_of_text if checkpoints is None else position + JSON_CHECKPOINT_INTERVAL
+    )
+    sync_start, shift, previous = (end_of_text, 0, {}) if sync is None else sync
+    while True:
+        if stack[-1] == _OBJECT_CLOSER:
+            pattern = _OBJECT_START_PATTERN if opened else _OBJECT_NEXT_PATTERN
+        else:
+            pattern = _ARRAY_START_PATTERN if opened else _ARRAY_NEXT_PATTERN
+        match = pattern.match(json_string, position)
+        if match is None or match.end() == position:
+            return position, bytes(stack), opened
+        position = match.end()
+        if match.lastindex is None:
+            # A run of items that continues after them.
+            opened = False
+        else:
+            bracket: str = json_string[position - 1]
+            run: int = json_string.count(
+                bracket, match.start(match.lastindex), position
+            )
+            if bracket == "{":
+                stack += b"}" * run
+                opened = True
+            elif bracket == "[":
+                stack += b"]" * run
+                opened = True
+            else:
+                start: int = len(stack) - run
+                if start < 0 or stack.count(ord(bracket), start) != run:
+                    return match.start(match.lastindex), bytes(stack), opened
+                del stack[start:]
+                if not stack:
+                    if _END_PATTERN.match(json_string, position) is None:
+                        return position, b"", False
+                    return None
+                opened = False
+        if position >= next_checkpoint:
+            checkpoints[position] = (bytes(stack), opened)
+            next_checkpoint = position + JSON_CHECKPOINT_INTERVAL
+        if position >= sync_start:
+            state: tuple[bytes, bool] | None = previous.get(position - shift)
+            if state is not None and state[1] == opened and state[0] == stack:
+                # The rest of the text and the state are the same as in the previous scan.
+                if checkpoints is not None:
+                    checkpoints.update(
+                        (previous_position + shift, previous_state)
+                        for previous_position, previous_state in previous.items()
+                        if previous_position + shift > position
+                    )
+                return None
+
+
+def _json_error(
+    json_string: str, state: tuple[int, bytes, bool]
+) -> json.JSONDecodeError | None:
+    """
+    Finds the error of an invalid JSON string after the last valid scanner state
+    with the token level reformatter, which reports errors as json does.
+
+    :param json_string: The JSON string.
+    :param state: The state returned by _scan_json or _scan_containers.
+    :return: The error, or None if no error was found.
+    """
+    position, stack, opened = state
+    tokens = _JsonTokenizer(json_string, JSON_CHUNK_SIZE, position)
+    if position and not stack:
+        # The document has ended, only whitespace may follow it.
+        return tokens.error(
+            "Extra data", _WS_PATTERN.match(json_string, position).end()
+        )
+    try:
+        _reformat(tokens, _DiscardedText(), None, False, (stack, opened))
+    except json.JSONDecodeError as e:
+        return e
+    return None
+
+
+class _DiscardedText(io.TextIOBase):
+    """
+    A text file object that drops everything written to it.
+    """
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+class _JsonTokenizer:
+    """
+    Splits JSON read from a string or a file object into tokens.
+
+    Tokens are matched with one regular expression over a buffer of at most a few
+    chunks: consumed text is dropped when the next chunk is read. A token cut by
+    the end of the buffer is completed with the next chunk. Line and column
+    numbers of errors are tracked across dropped text.
+    """
+
+    def __init__(self, source: str | TextIO, chunk_size: int, start: int = 0) -> None:
+        self._stream: TextIO | None = None if isinstance(source, str) else source
+        self._buffer: str = source if isinstance(source, str) else ""
+        self._chunk_size: int = chunk_size
+        # Position in a string source to read tokens from.
+        self._start: int = start
+        # Absolute position of the end of the input, known once all tokens are read.
+        self.position: int = 0
+        # Absolute position of the buffer start, its line and the start of that line.
+        self._offset: int = 0
+        self._lineno: int = 1
+        self._line_start: int = 0
+
+    def __iter__(self) -> Iterator[tuple[int, str, int]]:
+        """
+        Yields (kind, text, absolute position) of every token, and stops after an
+        invalid token with empty text at text that does not start a token.
+        """
+        buffer: str = self._buffer
+        position: int = self._start
+        end_of_input: bool = self._stream is None
+        match_token = _TOKEN_PATTERN.match
+        while True:
+            match = match_token(buffer, position)
+            if match is not None:
+                kind: int = match.lastindex
+                start: int = match.start(kind)
+                if (
+                    end_of_input
+                    or kind != _NUMBER
+                    or not _NUMBER_PREFIX_PATTERN.match(buffer, start)
+                ):
+                    yield kind, match.group(kind), self._offset + start
+                    position = match.end()
+                    continue
+            rest: int = position
+            while rest < len(buffer) and buffer[rest] in " \t\n\r":
+                rest += 1
+            if end_of_input:
+                if rest < len(buffer):
+                    yield _INVALID, "", self._offset + rest
+                    return
+                self._drop(buffer, rest)
+                self._buffer, self.position = buffer[rest:], self._offset
+                return
+            if rest < len(buffer) and not _is_token_prefix(buffer, rest):
+                yield _INVALID, "", self._offset + rest
+                return
+            chunk: str = self._stream.read(self._chunk_size)
+            if not chunk:
+                end_of_input = True
+                continue
+            self._drop(buffer, position)
+            buffer = self._buffer = buffer[position:] + chunk
+            position = 0
+
+    def error(self, message: str, position: int) -> json.JSONDecodeError:
+        """
+        Creates a JSONDecodeError for an absolute position in the buffer.
+        """
+        buffer: str = self._buffer
+        index: int = max(0, position - self._offset)
+        lineno: int = self._lineno + buffer.count("\n", 0, index)
+        line_break: int = buffer.rfind("\n", 0, index)
+        colno: int = (
+            index - line_break if line_break >= 0 else position - self._line_start + 1
+        )
+        error = json.JSONDecodeError(message, buffer, index)
+        error.pos, error.lineno, error.colno = position, lineno, colno
+        error.args = (
+            "{}: line {} column {} (char {})".format(message, lineno, colno, position),
+        )
+        return error
+
+    def invalid_token_error(self, message: str, position: int) -> json.JSONDecodeError:
+        """
+        Creates the error for an invalid token where a value or a key is expected,
+        with the message of json for invalid strings.
+        """
+        index: int = position - self._offset
+        if self._buffer[index] == '"':
+            try:
+                scanstring(self._buffer, index + 1)
+            except json.JSONDecodeError as e:
+                return self.error(e.msg, self._offset + e.pos)
+        return self.error(message, position)
+
+    def _drop(self, buffer: str, position: int) -> None:
+        self._lineno += buffer.count("\n", 0, position)
+        line_break: int = buffer.rfind("\n", 0, position)
+        if line_break >= 0:
+            self._line_start = self._offset + line_break + 1
+        self._offset += position
+
+
+def _is_token_prefix(buffer: str, index: int) -> bool:
+    """
+    Tells whether the rest of the buffer may be the start of a token.
+    """
+    rest: str = buffer[index:]
+    return bool(
+        _STRING_PREFIX_PATTERN.match(rest)
+        or _NUMBER_PREFIX_PATTERN.match(rest)
+        or any(literal.startswith(rest) for literal in _LITERALS)
+    )
+
+
+def _normalize_scalar(kind: int, text: str) -> str:
+    """
+    Writes a string or a number token the way json.dumps writes its parsed value.
+    """
+    if kind == _STRING:
+        if "\\" not in text and text.isascii():
+            return text
+        return encode_basestring_ascii(scanstring(text, 1)[0])
+    if kind == _NUMBER:
+        if "." in text or "e" in text or "E" in text:
+            value: float = float(text)
+            if value != value or value in (float("inf"), float("-inf")):
+                return json.dumps(value)
+            return float.__repr__(value)
+        return "0" if text == "-0" else text
+    return text
+
+
+def _reformat(
+    tokens: _JsonTokenizer,
+    destination: TextIO,
+    indentation: int | None,
+    sort_keys: bool,
+    resume: tuple[bytes, bool] | None = None,
+) -> None:
+    """
+    Reformats the tokens with an explicit stack of open containers.
+
+    Every frame of the stack is [closing character, number of items, members],
+    where members collect the objects of sort_keys as {key: [key text, value pieces]}.
+    Pieces are written to the current sink: the output list, or the value pieces
+    of a member of a sorted object.
+
+    Tokens read from the middle of a document are checked from the resume state
+    (closing brackets of the open containers, whether the tokens follow an opening
+    bracket) of _scan_containers, without sort_keys and to a discarded output.
+    """
+    key_separator: str = ":" if indentation is None else ": "
+    indents: list[str] = ["\n"]
+
+    def indent(depth: int) -> str:
+        if indentation is None:
+            return ""
+        while len(indents) <= depth:
+            indents.append("\n" + " " * (indentation * len(indents)))
+        return indents[depth]
+
+    def expectation() -> str:
+        if expect_key:
+            return "Expecting property name enclosed in double quotes"
+        if expect_colon:
+            return "Expecting ':' delimiter"
+        if expect_next:
+            return "Expecting ',' delimiter"
+        return "Expecting value"
+
+    output: list[str] = []
+    sink: list[str] = output
+    sinks: list[list[str]] = []
+    stack: list[list] = []
+    # What the next token can be: a value, a key, a ':', a ',' or a closing bracket.
+    expect_value, expect_key, expect_colon, expect_next = True, False, False, False
+    allow_close: bool = False
+    done: bool = False
+    if resume is not None and resume[0]:
+        closers, opened = resume
+        stack = [[chr(closer), 1, None] for closer in closers]
+        in_object: bool = closers[-1] == _OBJECT_CLOSER
+        expect_value = opened and not in_object
+        expect_key = opened and in_object
+        expect_next = not opened
+        allow_close = opened
+
+    for kind, text, position in tokens:
+        if done:
+            raise tokens.error("Extra data", position)
+        if len(output) > _WRITE_PIECES:
+            destination.write("".join(output))
+            output.clear()
+        frame: list | None = stack[-1] if stack else None
+
+        if kind == _INVALID:
+            if expect_value or expect_key:
+                raise tokens.invalid_token_error(expectation(), position)
+            raise tokens.error(expectation(), position)
+
+        if expect_colon:
+            if text != ":" or kind != _PUNCTUATION:
+                raise tokens.error("Expecting ':' delimiter", position)
+            if frame[2] is None:
+                sink.append(key_separator)
+            expect_colon, expect_value = False, True
+            continue
+
+        if kind == _PUNCTUATION and text in "]}":
+            if not (expect_next or allow_close) or frame is None or frame[0] != text:
+                raise tokens.error(expectation(), position)
+            stack.pop()
+            depth: int = len(stack)
+            if frame[2] is not None:
+                sink = sinks.pop()
+                sink.append("{")
+                for index, key in enumerate(sorted(frame[2])):
+                    key_text, pieces = frame[2][key]
+                    if index:
+                        sink.append(",")
+                    sink.append(indent(depth + 1))
+                    sink.append(key_text)
+                    sink.append(key_separator)
+                    sink.extend(pieces)
+                if frame[2]:
+                    sink.append(indent(depth))
+                sink.append("}")
+            else:
+                if frame[1]:
+                    sink.append(indent(depth))
+                sink.append(text)
+            expect_value = expect_key = allow_close = False
+            expect_next = bool(stack)
+            done = not stack
+            continue
+
+        if expect_next:
+            if kind != _PUNCTUATION or text != ",":
+                raise tokens.error("Expecting ',' delimiter", position)
+            expect_next = allow_close = False
+            if frame[0] == "}":
+                expect_key = True
+            else:
+                expect_value = True
+            continue
+
+        if expect_key:
+            if kind != _STRING:
+                raise tokens.error(
+                    "Expecting property name enclosed in double quotes", position
+                )
+            key_text: str = _normalize_scalar(kind, text)
+            if frame[2] is not None:
+                pieces: list[str] = []
+                frame[2][scanstring(text, 1)[0]] = [key_text, pieces]
+                sink = pieces
+            else:
+                if frame[1]:
+                    sink.append(",")
+                sink.append(indent(len(stack)))
+                sink.append(key_text)
+            frame[1] += 1
+            expect_key = allow_close = False
+            expect_colon = True
+            continue
+
+        # A value is expected.
+        if kind == _PUNCTUATION and text not in "[{":
+            raise tokens.error("Expecting value", position)
+        if frame is not None and frame[0] == "]":
+            if frame[1]:
+                sink.append(",")
+            sink.append(indent(len(stack)))
+            frame[1] += 1
+        if kind == _PUNCTUATION:
+            if text == "{" and sort_keys:
+                sinks.append(sink)
+                stack.append(["}", 0, {}])
+            else:
+                sink.append(text)
+                stack.append(["}" if text == "{" else "]", 0, None])
+            expect_value = text == "["
+            expect_key = text == "{"
+            allow_close = True
+            continue
+        sink.append(_normalize_scalar(kind, text))
+        expect_value = allow_close = False
+        expect_next = bool(stack)
+        done = not stack
+
+    if not done:
+        raise tokens.error(expectation(), tokens.position)
+    destination.write("".join(output))
+
+
+class NdjsonModeIsNotSupportedException(Exception):
+    """
+    An exception that is raised when an unsupported mode is passed to the process_ndjson function.
+    """
+
+    def __init__(self, message: str) -> None:
+        """
+        Initializes a new instance of the NdjsonModeIsNotSupportedException class.
+
+        :param message: The error message.
+        """
+        Exception.__init__(self, message)
+
+
+class JsonPathIsInvalidException(ValueError):
+    """
+    An exception that is raised when the paths passed to the unflatten_json_paths function are invalid.
+    """
+
+    def __init__(self, message: str) -> None:
+        """
+        Initializes a new instance of the JsonPathIsInvalidException class.
+
+        :param message: The error message.
+        """
+        ValueError.__init__(self, message)
@@ -1,3 +1,5 @@
+from typing import TextIO
+
 import core.string_utils as su
 
 GIT_CONFIG_USER_NAME = 'git config{}user.name "{}"'
@@ -66,3 +68,18 @@ def join_commands_in_one(commands: list[str], ignore_errors: bool = False) -> st
     separator: str = " & " if ignore_errors else " && "
     result = su.join_lines(commands, separator=separator)
     return result
+
+
+def write_commands_in_one(
+    destination: TextIO, commands: list[str], ignore_errors: bool = False
+) -> None:
+    """
+    Writes a list of commands joined into a single command string to a file object
+    or a socket in chunks, without building the joined string (see su.write_lines).
+
+    :param destination: The file object or the socket to write to.
+    :param commands: The list of commands to join.
+    :param ignore_errors: Whether to ignore errors when executing the commands. Default is False.
+    """
+    separator: str = " & " if ignore_errors else " && "
+    su.write_lines(destination, commands, separator=separator)
@@ -1,3 +1,8 @@
+import io
+import json
+
+import pytest
+
 import core.json_utils as ju
 
 
@@ -56,3 +61,404 @@ def test_flatten_json() -> None:
     result = ju.flatten_json(json_actual)
 
     assert result == json_expected
+
+
+def test_validate_format_and_flatten_share_one_parse(monkeypatch) -> None:
+    parses = []
+    loads = ju.json.loads
+    monkeypatch.setattr(
+        ju.json, "loads", lambda text: parses.append(text) or loads(text)
+    )
+    ju.clear_json_cache()
+    json_actual = """{"wKey":100, "aKey":[1, 2.5, null]}"""
+
+    assert ju.validate_json(json_actual) == ""
+    formatted = ju.format_json(json_actual, sort_keys=False)
+    flattened = ju.flatten_json(formatted)
+
+    assert ju.format_json(flattened, sort_keys=False) == formatted
+    assert flattened == """{"wKey":100,"aKey":[1,2.5,null]}"""
+    assert parses == [json_actual]
+
+
+def test_json_cache_errors_and_budget(monkeypatch) -> None:
+    monkeypatch.setattr(ju, "JSON_CACHE_BUDGET", 20 * ju._PARSED_SIZE_FACTOR)
+    ju.clear_json_cache()
+    invalid = """{"wKey":100,"""
+
+    first_error = ju.validate_json(invalid)
+
+    assert first_error and ju.validate_json(invalid) == first_error
+    assert ju.validate_json("[1, 2, 3]") == ""
+    assert len(ju._parse_cache) == 1
+    assert ju._parse_cache_size == 9 * ju._PARSED_SIZE_FACTOR
+    ju.clear_json_cache()
+    assert len(ju._parse_cache) == 0
+
+
+def test_reformat_json_matches_format_and_flatten() -> None:
+    json_actual = (
+        """{"wKey":100, "zKey":[true, 1.50, -0, 1E400, "\\u00e9\\/"],"""
+        """ "aKey":{"newObj":["key1","aKey"], "empty":{}, "list":[]}}"""
+    )
+
+    for chunk_size in [1, 7, 1000]:
+        for indentation in [0, 2, 4]:
+            for sort_keys in [False, True]:
+                result = ju.reformat_json(
+                    io.StringIO(json_actual),
+                    indentation=indentation,
+                    sort_keys=sort_keys,
+                    chunk_size=chunk_size,
+                )
+                assert result == ju.format_json(
+                    json_actual, indentation=indentation, sort_keys=sort_keys
+                )
+        minified = ju.reformat_json(
+            io.StringIO(json_actual), indentation=None, chunk_size=chunk_size
+        )
+        assert minified == ju.flatten_json(json_actual)
+
+
+def test_reformat_json_sort_keys_keeps_last_duplicate(tmp_path) -> None:
+    source = tmp_path / "source.json"
+    destination = tmp_path / "destination.json"
+    source.write_text("""[{"b": 1, "a": 2, "b": 3}, "x"]""", encoding="utf-8")
+
+    ju.reformat_json_file(str(source), str(destination), None, sort_keys=True)
+
+    assert destination.read_text(encoding="utf-8") == """[{"a":2,"b":3},"x"]"""
+
+
+def test_reformat_json_errors_match_json() -> None:
+    for invalid in [
+        """{"a" 1}""",
+        "[1,]",
+        "[1\n 2]",
+        """{"a":1,}""",
+        "[1]]",
+        "[1,2",
+        "[1 x]",
+        """{"a" x}""",
+        """{x}""",
+    ]:
+        with pytest.raises(json.JSONDecodeError) as expected:
+            json.loads(invalid)
+        with pytest.raises(json.JSONDecodeError) as actual:
+            ju.reformat_json(io.StringIO(invalid), chunk_size=2)
+
+        assert str(actual.value) == str(expected.value)
+
+
+def test_check_json_matches_json() -> None:
+    for valid in [
+        "1",
+        " [] ",
+        """{"a[": [{"b": [1, {"c": [{"d": {}}]}], "e{": -1.5E3}], "f": "\\u00e9"}""",
+        "[NaN, -Infinity, true, false, null]",
+        "[1, 2,3 ,\n-4.5e1, null, 6, [7], 8]",
+        json.dumps(list(range(1000))),
+    ]:
+        ju.check_json(valid)
+
+    for invalid in [
+        "",
+        "\ufeff[]",
+        "[[[{}]]",
+        "[[[{}}]]",
+        """{"a": [1, 2,]}""",
+        """{"a": [{"b": 01}]}""",
+        """[{"a": "\x01"}]""",
+        """[{"a"\n: 1}] x""",
+        "[1, 2, 03]",
+        "[1, 2, 3.]",
+        "[1, 2, -]",
+        "[1, 2, 3 4]",
+        "[" + ", ".join(map(str, range(1000))) + ", 1e]",
+    ]:
+        with pytest.raises(json.JSONDecodeError) as expected:
+            json.loads(invalid)
+        with pytest.raises(json.JSONDecodeError) as actual:
+            ju.check_json(invalid)
+
+        assert str(actual.value) == str(expected.value)
+
+
+def test_validate_json_deep_nesting() -> None:
+    depth: int = 100_000
+    valid: str = """[{"a":""" * depth + "1" + "}]" * depth
+    invalid: str = "[" * depth + "]" * (depth - 1) + "}"
+
+    assert ju.validate_json(valid) == ""
+    assert ju.validate_json(invalid) == (
+        "Expecting ',' delimiter: line 1 column 200000 (char 199999)"
+    )
+
+
+def test_process_ndjson() -> None:
+    ndjson = '{"b": 1, "a": [1, 2]}\r\n\n  \n{"a": }\n[true,null]\n'
+
+    output, errors = ju.process_ndjson(ndjson, ju.NDJSON_FLATTEN)
+
+    assert output == '{"b":1,"a":[1,2]}\n{"a": }\n[true,null]'
+    assert errors == [(4, "Expecting value: column 7")]
+
+    output, errors = ju.process_ndjson(ndjson, ju.NDJSON_FORMAT, indentation=1)
+
+    assert (
+        output == '{\n "a": [\n  1,\n  2\n ],\n "b": 1\n}\n{"a": }\n[\n true,\n null\n]'
+    )
+    assert ju.process_ndjson(ndjson) == ("", errors)
+
+    with pytest.raises(ju.NdjsonModeIsNotSupportedException):
+        ju.process_ndjson(ndjson, "pretty")
+
+
+def test_process_ndjson_in_worker_processes(monkeypatch) -> None:
+    monkeypatch.setattr(ju, "NDJSON_BATCH_SIZE", 16)
+    monkeypatch.setattr(ju, "PARALLEL_NDJSON_THRESHOLD", 0)
+    records = ['{"id": %d}' % index if index % 7 else "{" for index in range(200)]
+    ndjson = "\n".join(records)
+
+    result = ju.process_ndjson(ndjson, ju.NDJSON_FLATTEN, workers=3)
+
+    assert result == ju.process_ndjson(ndjson, ju.NDJSON_FLATTEN, workers=1)
+    assert result[1][:2] == [
+        (1, "Expecting property name enclosed in double quotes: column 2"),
+        (8, "Expecting property name enclosed in double quotes: column 2"),
+    ]
+
+
+def test_iter_json_children() -> None:
+    json_string = ' {"a": [1, {"b": "]}"}], "c\\"": {} , "d":-1.5e3}'
+
+    children = list(ju.iter_json_children(json_string))
+
+    assert [(key, json_string[start:end]) for key, start, end in children] == [
+        ("a", '[1, {"b": "]}"}]'),
+        ('c"', "{}"),
+        ("d", "-1.5e3"),
+    ]
+    items = list(ju.iter_json_children(json_string, children[0][1]))
+    assert [json_string[start:end] for _, start, end in items] == ["1", '{"b": "]}"}']
+    assert [key for key, _, _ in items] == [None, None]
+    assert list(ju.iter_json_children(json_string, children[1][1])) == []
+    assert list(ju.iter_json_children(json_string, children[2][1])) == []
+
+
+def test_merge_edits() -> None:
+    original = "0123456789"
+    edited = original[:2] + "abc" + original[5:]  # (2, 3, 3)
+    edited = edited[:6] + edited[8:]  # (6, 2, 0)
+
+    position, removed, added = ju.merge_edits(ju.merge_edits(None, 2, 3, 3), 6, 2, 0)
+
+    assert (
+        original[:position]
+        + edited[position : position + added]
+        + original[position + removed :]
+        == edited
+    )
+
+
+def test_json_edit_checker(monkeypatch) -> None:
+    monkeypatch.setattr(ju, "JSON_CHECKPOINT_INTERVAL", 8)
+    json_string = json.dumps(
+        {"items": [{"id": i, "tags": ["a", "b"]} for i in range(50)]}
+    )
+    checker = ju.JsonEditChecker()
+    checker.check(json_string)
+
+    position = json_string.index('"id": 25') + 6
+    edited = json_string[:position] + "1" + json_string[position:]
+    checker.check(edited, (position, 0, 1))
+
+    broken = edited[:position] + "x" + edited[position:]
+    with pytest.raises(json.JSONDecodeError) as error:
+        checker.check(broken, (position, 0, 1))
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(broken)
+    assert str(error.value) == str(expected.value)
+
+    checker.check(edited, (position, 1, 0))
+    assert checker._checkpoints
+
+
+def test_json_edit_checker_utf16_positions(monkeypatch) -> None:
+    monkeypatch.setattr(ju, "JSON_CHECKPOINT_INTERVAL", 8)
+    json_string = json.dumps(
+        {"items": [{"id": i, "a": {"b": ["\U0001f600" * 3]}} for i in range(50)]},
+        ensure_ascii=False,
+    )
+    checker = ju.JsonEditChecker()
+    checker.check(json_string, utf16=True)
+
+    def utf16_position(position: int) -> int:
+        return len(json_string[:position].encode("utf-16-le")) // 2
+
+    position = json_string.index('"id": 40') - 2
+    broken = json_string[:position] + "x" + json_string[position + 1 :]
+    with pytest.raises(json.JSONDecodeError) as error:
+        checker.check(broken, (utf16_position(position), 1, 1), utf16=True)
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(broken)
+    assert str(error.value) == str(expected.value)
+
+    checker.check(json_string)
+    checker.check(json_string, (utf16_position(position), 1, 1), utf16=True)
+    position = json_string.index('"id": 45') + 6
+    edited = json_string[:position] + "\U0001f600" + json_string[position + 1 :]
+    with pytest.raises(json.JSONDecodeError):
+        checker.check(edited, (utf16_position(position), 1, 2), utf16=True)
+
+
+def test_iter_json_paths() -> None:
+    json_string = '{"a": {"b": [1, {"c": "x"}, []]}, "d.e": {}, "": null}'
+
+    assert list(ju.iter_json_paths(json_string)) == [
+        ("a.b[0]", 1),
+        ("a.b[1].c", "x"),
+        ("a.b[2]", []),
+        ('["d.e"]', {}),
+        ('[""]', None),
+    ]
+    assert list(ju.iter_json_paths("1.5")) == [("", 1.5)]
+
+
+def test_flatten_and_unflatten_json_paths() -> None:
+    json_string = '{"a": {"b": [1, {"c": "x"}, []]}, "d.e": {}, "": null}'
+
+    flattened = ju.flatten_json_paths(json_string, indentation=None)
+
+    assert flattened == (
+        '{"a.b[0]":1,"a.b[1].c":"x","a.b[2]":[],"[\\"d.e\\"]":{},"[\\"\\"]":null}'
+    )
+    assert ju.unflatten_json_paths(flattened, indentation=None) == ju.flatten_json(
+        json_string
+    )
+    assert ju.unflatten_json_paths([("x[1]", 2), ("x[0]", 1)], None) == '{"x":[1,2]}'
+
+
+def test_json_paths_deep_nesting() -> None:
+    json_string = '{"a":' * 20000 + "[1]" + "}" * 20000
+
+    flattened = ju.flatten_json_paths(json_string, indentation=None)
+
+    assert flattened == '{"' + "a." * 19999 + 'a[0]":1}'
+    assert ju.unflatten_json_paths(flattened, indentation=None) == json_string
+
+
+@pytest.mark.parametrize(
+    "flat_json",
+    [
+        '{"a": 1, "a.b": 2}',
+        '{"a[1]": 1}',
+        '{"a..b": 1}',
+        '{"a[0]": 1, "a.b": 2}',
+        '{"a": {}, "a.b": 1}',
+        '{"a.b": 1, "a": {}}',
+        '{"a": [], "a[0]": 1}',
+        "[]",
+    ],
+)
+def test_unflatten_json_paths_invalid(flat_json: str) -> None:
+    with pytest.raises(ju.JsonPathIsInvalidException):
+        ju.unflatten_json_paths(flat_json)
+
+
+def test_unflatten_json_paths_keeps_values() -> None:
+    value = {"b": [1]}
+
+    assert ju.unflatten_json_paths([("a", value), ("c[0]", value)], None) == (
+        '{"a":{"b":[1]},"c":[{"b":[1]}]}'
+    )
+    with pytest.raises(ValueError):
+        ju.unflatten_json_paths([("a", value), ("a.c", 2)])
+    with pytest.raises(ValueError):
+        ju.unflatten_json_paths([("a", value), ("a.b[1]", 2)])
+    assert value == {"b": [1]}
+
+
+def test_diff_json() -> None:
+    old_json = '{"a": [1, 2, 3, 4], "b": {"c/d": true}, "e": 1, "f": {"x": 1, "y": 2}}'
+    new_json = '{"a": [1, 3, 4, 5], "b": {"c/d": 1}, "g": null, "f": {"y": 2, "x": 1}}'
+
+    operations = ju.diff_json(old_json, new_json)
+
+    assert sorted(operations, key=lambda operation: operation["path"]) == [
+        {"op": "remove", "path": "/a/1"},
+        {"op": "add", "path": "/a/3", "value": 5},
+        {"op": "replace", "path": "/b/c~1d", "value": 1},
+        {"op": "remove", "path": "/e"},
+        {"op": "add", "path": "/g", "value": None},
+    ]
+    assert ju.diff_json(old_json, old_json) == []
+    assert ju.diff_json("[1]", "[1.0]") == [
+        {"op": "replace", "path": "/0", "value": 1.0}
+    ]
+    with pytest.raises(json.JSONDecodeError):
+        ju.diff_json("[1", "[1")
+
+
+def test_diff_json_deep_nesting() -> None:
+    depth: int = 5000
+    old_json = '{"a":' * depth + "[1,2]" + "}" * depth
+    new_json = '{"a":' * depth + "[1,3]" + "}" * depth
+
+    assert ju.diff_json(old_json, new_json) == [
+        {"op": "replace", "path": "/a" * depth + "/1", "value": 3}
+    ]
+
+    operations = ju.diff_json("{}", '{"b":' + old_json + "}")
+
+    assert ju.dump_json(operations, indentation=None) == (
+        '[{"op":"add","path":"/b","value":' + old_json + "}]"
+    )
+    with pytest.raises(json.JSONDecodeError):
+        ju.diff_json(old_json, new_json + "]")
+
+    # Hash collisions deeper than the recursion limit of ==.
+    deep_json = '{"a":' * 1200 + "[-1]" + "}" * 1200
+    assert ju.diff_json(deep_json, deep_json.replace("-1", "-2")) == [
+        {"op": "replace", "path": "/a" * 1200 + "/0", "value": -2}
+    ]
+    assert ju.diff_json(deep_json, deep_json.replace(":", ": ")) == []
+
+
+def test_diff_json_hash_collisions() -> None:
+    # hash(-1) == hash(-2) and hash(2**61 - 1) == hash(0).
+    assert ju.diff_json("[-1]", "[-2]") == [
+        {"op": "replace", "path": "/0", "value": -2}
+    ]
+    assert ju.diff_json('{"a": [-1]}', '{"a": [-2]}') == [
+        {"op": "replace", "path": "/a/0", "value": -2}
+    ]
+    assert ju.diff_json('{"a": -1, "b": 0}', '{"a": -2, "b": 0}') == [
+        {"op": "replace", "path": "/a", "value": -2}
+    ]
+    assert ju.diff_json("[0]", "[{}]".format(2**61 - 1)) == [
+        {"op": "replace", "path": "/0", "value": 2**61 - 1}
+    ]
+    assert ju.diff_json("[[0], 1, [-1]]", "[[{}], 1, [-2]]".format(2**61 - 1)) == [
+        {"op": "replace", "path": "/2/0", "value": -2},
+        {"op": "replace", "path": "/0/0", "value": 2**61 - 1},
+    ]
+
+
+def test_diff_json_order() -> None:
+    old_json = json.dumps({key: 1 for key in "zyxwvut"})
+    new_json = json.dumps({key: 1 for key in "uvw"})
+
+    assert ju.diff_json(old_json, new_json) == [
+        {"op": "remove", "path": "/" + key} for key in "zyxt"
+    ]
+
+    old_items = list(range(1000))
+    new_items = [-1] + old_items[:500] + old_items[501:]
+    new_items[700] = "x"
+
+    assert ju.diff_json(json.dumps(old_items), json.dumps(new_items)) == [
+        {"op": "add", "path": "/0", "value": -1},
+        {"op": "remove", "path": "/501"},
+        {"op": "replace", "path": "/700", "value": "x"},
+    ]
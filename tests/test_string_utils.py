@@ -1,3 +1,6 @@
+import io
+import random
+
 import pytest
 
 import core.string_utils as su
@@ -218,3 +221,620 @@ def test_join_lines():
     res_2 = su.join_lines(lines_to_join_2, separator="&&")
 
     assert res_2 == "line1&&line2&&line3&&line4&&line5"
+
+
+def test_make_lines_from_file_object():
+    stream = io.StringIO("  first line \n\n second line\n   \nthird line  ")
+
+    assert su.make_lines(stream) == ["first line", "second line", "third line"]
+
+
+def test_iter_lines_separator_across_chunks():
+    text = "one && two&&three  &&&& four&&"
+
+    for chunk_size in range(1, len(text) + 1):
+        stream = io.StringIO(text)
+        result = list(su.iter_lines(stream, separator="&&", chunk_size=chunk_size))
+        assert result == ["one", "two", "three", "four"]
+
+
+def test_iter_lines_from_text():
+    result = su.iter_lines("  a,b ,, c ,", separator=",")
+
+    assert not isinstance(result, list)
+    assert list(result) == ["a", "b", "c"]
+
+
+def test_iter_lines_empty_separator():
+    with pytest.raises(ValueError):
+        list(su.iter_lines("text", separator=""))
+
+
+def test_sort_and_join_lines_consume_iter_lines():
+    stream = io.StringIO("pear\nApple\n\nbanana\n")
+
+    sorted_lines = su.sort_lines(su.iter_lines(stream), case_insensitive=True)
+    joined = su.join_lines(su.iter_lines(io.StringIO("a\nb\n\nc")), separator="-")
+
+    assert sorted_lines == ["Apple", "banana", "pear"]
+    assert joined == "a-b-c"
+
+
+def _random_lines(count: int) -> list[str]:
+    generator = random.Random(42)
+    words = ["apple", "Apple", "APPLE", "banana", "Banana", "cherry", "date", "Date"]
+    return [
+        "{}{}".format(generator.choice(words), generator.randint(0, 20))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("order", [su.ASC, su.DESC])
+@pytest.mark.parametrize("case_insensitive", [False, True])
+def test_external_sort_lines_matches_sort_lines(monkeypatch, order, case_insensitive):
+    monkeypatch.setattr(su, "MAX_MERGE_FAN_IN", 3)
+    monkeypatch.setattr(su, "SPILL_BLOCK_SIZE", 7)
+    lines = _random_lines(500)
+
+    result = su.external_sort_lines(
+        iter(lines), order=order, case_insensitive=case_insensitive, memory_budget=2000
+    )
+
+    assert list(result) == su.sort_lines(
+        lines, order=order, case_insensitive=case_insensitive
+    )
+
+
+@pytest.mark.parametrize("case_insensitive", [False, True])
+def test_external_sort_lines_bytes_matches_line_buffer(case_insensitive):
+    lines = [line.encode() for line in _random_lines(500)]
+    buffer = su.LineBuffer.from_lines(lines, binary=True)
+
+    result = su.external_sort_lines(
+        iter(lines), case_insensitive=case_insensitive, memory_budget=2000, binary=True
+    )
+
+    assert list(result) == list(
+        su.sort_lines(buffer, case_insensitive=case_insensitive)
+    )
+
+
+def test_external_sort_lines_order_exception():
+    with pytest.raises(su.SortingOrderIsNotSupportedException):
+        su.external_sort_lines(["line1", "line2"], order="non-existing")
+
+
+def test_sort_file():
+    source = io.StringIO("pear\n  Apple \n\nbanana\ncherry")
+    destination = io.StringIO()
+
+    su.sort_file(source, destination, order=su.DESC, memory_budget=100)
+
+    assert destination.getvalue() == "pear\ncherry\nbanana\nApple"
+
+
+@pytest.mark.parametrize("order", [su.ASC, su.DESC])
+@pytest.mark.parametrize("case_insensitive", [False, True])
+def test_parallel_sort_lines_matches_sort_lines(order, case_insensitive):
+    lines = _random_lines(300) + ["", "with\x00zero", "Apple1"]
+
+    result = su.parallel_sort_lines(
+        lines, order=order, case_insensitive=case_insensitive, workers=3
+    )
+
+    assert result == su.sort_lines(
+        lines, order=order, case_insensitive=case_insensitive
+    )
+
+
+def test_sort_lines_does_not_switch_to_parallel_sort(monkeypatch):
+    calls = []
+    monkeypatch.setattr(su.os, "cpu_count", lambda: 64)
+    monkeypatch.setattr(
+        su, "parallel_sort_lines", lambda lines, **kwargs: calls.append(lines) or []
+    )
+
+    assert su.sort_lines(_random_lines(1000)) == sorted(_random_lines(1000))
+    assert calls == []
+
+
+def test_line_buffer_make_lines():
+    text = "  first line \n\n second line\n   \nthird line  "
+
+    buffer = su.make_lines(su.LineBuffer(text))
+
+    assert isinstance(buffer, su.LineBuffer)
+    assert list(buffer) == su.make_lines(text)
+    assert buffer.data is text
+
+
+def test_line_buffer_split_strip_and_filter_empty():
+    buffer = su.LineBuffer(b" a ,, b,  ,c ").split(",")
+
+    assert list(buffer) == [b" a ", b"", b" b", b"  ", b"c "]
+    assert list(buffer.strip()) == [b"a", b"", b"b", b"", b"c"]
+    assert list(buffer.filter_empty()) == [b" a ", b" b", b"c "]
+
+
+@pytest.mark.parametrize("order", [su.ASC, su.DESC])
+@pytest.mark.parametrize("case_insensitive", [False, True])
+@pytest.mark.parametrize("sort_run", [7, su.LINE_BUFFER_SORT_RUN])
+def test_line_buffer_sort_lines_matches_list(
+    monkeypatch, order, case_insensitive, sort_run
+):
+    monkeypatch.setattr(su, "LINE_BUFFER_SORT_RUN", sort_run)
+    lines = _random_lines(200)
+    buffer = su.make_lines(su.LineBuffer("\n".join(lines)))
+
+    result = su.sort_lines(buffer, order=order, case_insensitive=case_insensitive)
+
+    assert isinstance(result, su.LineBuffer)
+    assert list(result) == su.sort_lines(
+        lines, order=order, case_insensitive=case_insensitive
+    )
+
+
+def test_line_buffer_bytes_case_insensitive_sort():
+    lines = ["äpfel", "Zebra", "Äpfel", "apple", "zebra"]
+    buffer = su.make_lines(su.LineBuffer("\n".join(lines).encode()))
+
+    result = su.sort_lines(buffer, case_insensitive=True)
+
+    assert [line.decode() for line in result] == su.sort_lines(
+        lines, case_insensitive=True
+    )
+
+
+def test_line_buffer_join_lines():
+    text_buffer = su.make_lines(su.LineBuffer("c\nb\na"))
+    bytes_buffer = su.make_lines(su.LineBuffer(b"c\nb\na"))
+
+    assert su.join_lines(text_buffer, separator="&&") == "c&&b&&a"
+    assert su.join_lines(bytes_buffer, separator="&&") == b"c&&b&&a"
+    assert su.join_lines(su.LineBuffer("")) == ""
+
+
+@pytest.mark.parametrize("separator", ["\n", "&&", "aa"])
+def test_line_buffer_split_across_windows(monkeypatch, separator):
+    monkeypatch.setattr(su, "LINE_BUFFER_WINDOW", 3)
+    text = "  one&&two\n\naaaa  three  aaa&&&&\nfour_longer_than_window  "
+
+    buffer = su.LineBuffer(text)
+
+    assert list(buffer.split(separator)) == text.split(separator)
+    assert list(su.make_lines(buffer, separator)) == su.make_lines(text, separator)
+
+
+def test_open_mapped_file(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_bytes(b"pear\n  Apple \n\nbanana\ncherry\n")
+    destination = tmp_path / "destination.txt"
+
+    buffer = su.open_mapped_file(str(source))
+    sorted_lines = su.sort_lines(su.make_lines(buffer), case_insensitive=True)
+    with open(destination, "wb") as output:
+        sorted_lines.write_to(output, "\n")
+
+    assert sorted_lines.head(2) == [b"Apple", b"banana"]
+    assert sorted_lines.head(1, max_length=3) == [b"App"]
+    buffer.close()
+    assert destination.read_bytes() == b"Apple\nbanana\ncherry\npear"
+
+
+def test_open_mapped_empty_file(tmp_path):
+    source = tmp_path / "empty.txt"
+    source.write_bytes(b"")
+
+    buffer = su.open_mapped_file(str(source))
+
+    assert len(su.make_lines(buffer)) == 0
+    buffer.close()
+
+
+def test_unique_lines():
+    lines = ["b", "a", "B", "b", "c", "A"]
+
+    assert su.unique_lines(lines) == ["b", "a", "B", "c", "A"]
+    assert su.unique_lines(lines, case_insensitive=True) == ["b", "a", "c"]
+
+
+def test_count_lines():
+    lines = ["b", "a", "B", "b", "c", "A"]
+
+    assert su.count_lines(lines) == [("b", 2), ("a", 1), ("B", 1), ("c", 1), ("A", 1)]
+    assert su.count_lines(lines, case_insensitive=True) == [
+        ("b", 3),
+        ("a", 2),
+        ("c", 1),
+    ]
+
+
+@pytest.mark.parametrize("case_insensitive", [False, True])
+def test_unique_and_count_lines_bounded_memory(monkeypatch, case_insensitive):
+    monkeypatch.setattr(su, "SPILL_PARTITIONS", 3)
+    lines = _random_lines(1000)
+
+    unique = su.unique_lines(lines, case_insensitive, max_distinct=5)
+    counts = su.count_lines(iter(lines), case_insensitive, max_distinct=5)
+
+    assert unique == su.unique_lines(lines, case_insensitive)
+    assert counts == su.count_lines(lines, case_insensitive)
+
+
+def test_unique_lines_line_buffer():
+    buffer = su.make_lines(su.LineBuffer(b"b\na\nB\nb\nc\nA"))
+
+    result = su.unique_lines(buffer, case_insensitive=True)
+
+    assert isinstance(result, su.LineBuffer)
+    assert list(result) == [b"b", b"a", b"c"]
+
+
+def test_line_buffer_from_lines():
+    text_buffer = su.LineBuffer.from_lines(["one", "", "three"])
+    bytes_buffer = su.LineBuffer.from_lines(iter([b"1", b"22"]), binary=True)
+
+    assert list(text_buffer) == ["one", "", "three"]
+    assert text_buffer.data == "onethree"
+    assert su.join_lines(bytes_buffer, "\n") == b"1\n22"
+
+
+def test_set_operations_on_lines():
+    first = ["git", "Python", "vim", "git", "curl"]
+    second = ["python", "curl", "jq", "Jq"]
+
+    assert su.intersection_lines(first, second) == ["curl"]
+    assert su.difference_lines(first, second) == ["git", "Python", "vim"]
+    assert su.symmetric_difference_lines(first, second) == [
+        "git",
+        "Python",
+        "vim",
+        "python",
+        "jq",
+        "Jq",
+    ]
+    assert su.union_lines(first, second) == [
+        "git",
+        "Python",
+        "vim",
+        "curl",
+        "python",
+        "jq",
+        "Jq",
+    ]
+
+
+def test_set_operations_on_lines_case_insensitive():
+    first = ["git", "Python", "vim", "git", "curl"]
+    second = ["python", "curl", "jq", "Jq"]
+
+    assert su.intersection_lines(first, second, True) == ["Python", "curl"]
+    assert su.difference_lines(first, second, True) == ["git", "vim"]
+    assert su.symmetric_difference_lines(iter(first), iter(second), True) == [
+        "git",
+        "vim",
+        "jq",
+    ]
+    assert su.union_lines(first, second, True) == ["git", "Python", "vim", "curl", "jq"]
+
+
+@pytest.mark.parametrize("order", [su.ASC, su.DESC])
+@pytest.mark.parametrize("case_insensitive", [False, True])
+@pytest.mark.parametrize("limit", [0, 1, 7, 1000])
+def test_sort_lines_with_limit(order, case_insensitive, limit):
+    lines = _random_lines(300)
+    expected = su.sort_lines(lines, order=order, case_insensitive=case_insensitive)
+
+    result = su.sort_lines(
+        lines, order=order, case_insensitive=case_insensitive, limit=limit
+    )
+    streamed = su.top_lines(
+        iter(lines), limit, order=order, case_insensitive=case_insensitive
+    )
+    buffer = su.sort_lines(
+        su.make_lines(su.LineBuffer("\n".join(lines))),
+        order=order,
+        case_insensitive=case_insensitive,
+        limit=limit,
+    )
+
+    assert result == expected[:limit]
+    assert streamed == expected[:limit]
+    assert list(buffer) == expected[:limit]
+
+
+def test_sort_lines_with_limit_single_line():
+    assert su.sort_lines(["line"], limit=0) == []
+    assert su.sort_lines(["line"], limit=5) == ["line"]
+
+
+def test_line_pipeline():
+    text = "pear\n  Apple \n\nbanana\napple\nPear\ncherry"
+    pipeline = su.LinePipeline().sort(su.DESC, True).unique(True).limit(3)
+
+    assert pipeline.run(text, separator=",") == "Pear,cherry,banana"
+    assert pipeline.run(io.StringIO(text)) == "Pear\ncherry\nbanana"
+    assert su.join_lines(pipeline.lines(su.LineBuffer(text.encode())), ",") == (
+        b"Pear,cherry,banana"
+    )
+
+
+def test_line_pipeline_steps_keep_order():
+    lines = _random_lines(300)
+    text = "\n".join(lines)
+
+    unique_then_limit = su.LinePipeline().unique(True).limit(5)
+    sort_then_limit = su.LinePipeline().sort(su.DESC, True).limit(5)
+    limit_then_sort = su.LinePipeline().limit(5).sort()
+
+    assert (
+        list(unique_then_limit.lines(io.StringIO(text)))
+        == su.unique_lines(lines, True)[:5]
+    )
+    assert (
+        sort_then_limit.lines(io.StringIO(text))
+        == su.sort_lines(lines, su.DESC, True)[:5]
+    )
+    assert limit_then_sort.lines(text) == sorted(lines[:5])
+
+
+def test_line_pipeline_order_exception():
+    with pytest.raises(su.SortingOrderIsNotSupportedException):
+        su.LinePipeline().sort("non-existing")
+
+
+@pytest.mark.parametrize("case_insensitive", [False, True])
+def test_sorted_lines_add_and_remove(monkeypatch, case_insensitive):
+    monkeypatch.setattr(su, "SORTED_LINES_BLOCK_SIZE", 4)
+    generator = random.Random(7)
+    lines = _random_lines(200)
+    sorted_lines = su.SortedLines(lines[:50], case_insensitive)
+    expected = list(lines[:50])
+
+    for line in lines[50:]:
+        if expected and generator.random() < 0.4:
+            removed = expected[generator.randrange(len(expected))]
+            expected.remove(removed)
+            sorted_lines.remove(removed)
+        else:
+            expected.append(line)
+            sorted_lines.add(line)
+
+    assert len(sorted_lines) == len(expected)
+    assert list(sorted_lines) == su.sort_lines(
+        expected, case_insensitive=case_insensitive
+    )
+    assert list(reversed(sorted_lines)) == su.sort_lines(
+        expected, su.DESC, case_insensitive
+    )
+    with pytest.raises(ValueError):
+        sorted_lines.remove("missing line")
+
+
+def test_sorted_lines_model():
+    model = su.SortedLinesModel(["pear", "Apple", "banana"])
+
+    assert model.view() == ["Apple", "banana", "pear"]
+    assert model.view(su.DESC, True) == ["pear", "banana", "Apple"]
+
+    model.update(removed=["  banana "], added=["cherry", "", "apple"])
+
+    assert len(model) == 4
+    assert model.view(case_insensitive=True) == ["Apple", "apple", "cherry", "pear"]
+    assert model.view(su.DESC) == ["pear", "cherry", "apple", "Apple"]
+
+    model = su.SortedLinesModel(["b", "B", "a"])
+    model.update(removed=["a"], added=["A", "b"])
+
+    assert model.view(case_insensitive=True) == su.sort_lines(
+        ["b", "B", "A", "b"], case_insensitive=True
+    )
+    assert model.view(su.DESC, True) == ["b", "B", "b", "A"]
+
+
+def test_sort_lines_by_fields():
+    lines = [
+        "root   10  2.5  nginx-1.10.2",
+        "www    9   0.1  nginx-1.9.0",
+        "Admin  100 n/a  nginx-1.10.0",
+        "short",
+    ]
+
+    by_pid = su.sort_lines_by_fields(lines, [(1, su.FIELD_NUMERIC)])
+    by_version = su.sort_lines_by_fields(lines, [(3, su.FIELD_VERSION)], order=su.DESC)
+    by_user = su.sort_lines_by_fields(
+        lines, [(0, su.FIELD_LEXICOGRAPHIC)], case_insensitive=True
+    )
+
+    assert by_pid == [lines[1], lines[0], lines[2], lines[3]]
+    assert by_version == [lines[0], lines[2], lines[1], lines[3]]
+    assert by_user == [lines[2], lines[0], lines[3], lines[1]]
+    assert su.sort_lines_by_fields(lines, [(2, su.FIELD_NUMERIC)])[-2:] == [
+        lines[3],
+        lines[2],
+    ]
+
+
+def test_sort_lines_by_several_fields_with_separator():
+    lines = ["b,2,x", "a,10,y", "b,10,z", "a,2,w"]
+
+    result = su.sort_lines_by_fields(
+        lines, [(0, su.FIELD_LEXICOGRAPHIC), (1, su.FIELD_NUMERIC)], separator=","
+    )
+
+    assert result == ["a,2,w", "a,10,y", "b,2,x", "b,10,z"]
+
+
+def test_sort_lines_by_fields_unsupported_kind():
+    with pytest.raises(su.FieldKindIsNotSupportedException):
+        su.sort_lines_by_fields(["a"], [(0, "random")])
+
+
+def test_filter_lines():
+    lines = ["GET /index 200", "POST /login 500", "get /health 200", "PUT /x 404"]
+
+    assert su.filter_lines(lines, ["500", "404"]) == [lines[1], lines[3]]
+    assert su.filter_lines(lines, ["GET"], su.FILTER_EXCLUDE) == lines[1:]
+    assert su.filter_lines(lines, ["get", "put"], case_insensitive=True) == [
+        lines[0],
+        lines[2],
+        lines[3],
+    ]
+    assert su.filter_lines(lines, []) == []
+    assert su.filter_lines(lines, [""]) == lines
+    with pytest.raises(su.FilterModeIsNotSupportedException):
+        su.filter_lines(lines, ["a"], "both")
+
+
+def test_filter_lines_matches_naive_search():
+    lines = _random_lines(2000)
+    generator = random.Random(3)
+    patterns = [
+        line[start : start + generator.randint(1, 4)]
+        for line in generator.sample(lines, 50)
+        for start in [generator.randrange(len(line))]
+    ] + ["she", "hers", "his", "he"]
+
+    for case_insensitive in [False, True]:
+        fold = str.casefold if case_insensitive else str
+        expected = [
+            line for line in lines if any(fold(p) in fold(line) for p in patterns)
+        ]
+        assert su.filter_lines(lines, patterns, case_insensitive=case_insensitive) == (
+            expected
+        )
+
+
+def test_filter_line_buffer_and_pipeline():
+    text = "alpha\nBeta\ngamma\nbetamax\n"
+    buffer = su.LineBuffer(text.encode("utf-8")).split(b"\n", skip_empty=True)
+
+    filtered = su.filter_lines(buffer, ["beta"], case_insensitive=True)
+    pipeline = su.LinePipeline().filter(["beta"], su.FILTER_EXCLUDE).sort()
+
+    assert list(filtered) == [b"Beta", b"betamax"]
+    assert list(su.filter_lines(buffer, ["beta"])) == [b"betamax"]
+    assert pipeline.run(text) == "Beta\nalpha\ngamma"
+
+
+def test_near_duplicate_clusters():
+    lines = [
+        "2024-01-01 12:00:01 worker-7 request 1234 failed after 15 ms",
+        "completely different line",
+        "2024-01-01 12:00:05 worker-7 request 1299 failed after 17 ms",
+        "2024-01-01 12:00:01 worker-7 request 1234 failed after 15 ms",
+        "COMPLETELY different line",
+    ]
+
+    clusters = su.near_duplicate_clusters(lines, threshold=0.5)
+    ignore_case = su.near_duplicate_clusters(
+        lines, threshold=0.5, case_insensitive=True
+    )
+
+    assert clusters == [[lines[0], lines[2], lines[3]], [lines[1]], [lines[4]]]
+    assert ignore_case == [[lines[0], lines[2], lines[3]], [lines[1], lines[4]]]
+    assert su.near_unique_lines(lines, threshold=0.5) == [lines[0], lines[1], lines[4]]
+    with pytest.raises(ValueError):
+        su.near_unique_lines(lines, threshold=0)
+
+
+def test_near_duplicates_match_pairwise_check():
+    generator = random.Random(11)
+    lines = [
+        "user {} logged in from 10.0.{}.{}".format(
+            generator.choice(["alice", "bob", "carol"]),
+            generator.randint(0, 9),
+            generator.randint(0, 9),
+        )
+        for _ in range(300)
+    ] + _random_lines(100)
+
+    def jaccard(first, second, size=4):
+        first, second = first.encode(), second.encode()
+        first = {first[i : i + size] for i in range(len(first) - size + 1)}
+        second = {second[i : i + size] for i in range(len(second) - size + 1)}
+        return len(first & second) / len(first | second)
+
+    clusters = su.near_duplicate_clusters(lines, threshold=0.7)
+
+    assert sorted(sum(clusters, [])) == sorted(lines)
+    for cluster in clusters:
+        assert all(jaccard(cluster[0], line) >= 0.7 for line in cluster)
+    assert len(clusters) < len(set(lines))
+
+
+def test_bytes_lines():
+    data = b"  host-b.example.com \r\n\nHost-a.example.com\n\tpkg.\xc3\xa9t\xc3\xa9\n"
+
+    lines = su.make_lines(data)
+
+    assert lines == [
+        b"host-b.example.com",
+        b"Host-a.example.com",
+        b"pkg.\xc3\xa9t\xc3\xa9",
+    ]
+    assert su.make_lines(memoryview(data), separator=b"\n") == lines
+    assert su.sort_lines(lines) == sorted(lines)
+    assert su.sort_lines(lines, su.DESC, case_insensitive=True) == [
+        b"pkg.\xc3\xa9t\xc3\xa9",
+        b"host-b.example.com",
+        b"Host-a.example.com",
+    ]
+    assert su.sort_lines(lines, limit=1) == [b"Host-a.example.com"]
+    assert su.join_lines(lines, "\n") == b"\n".join(lines)
+    assert su.join_lines(iter(lines), "\n") == b"\n".join(lines)
+    assert su.join_lines((b"a", b"b"), " ") == b"a b"
+    assert [
+        line.decode("utf-8") for line in su.sort_lines(lines, case_insensitive=True)
+    ] == su.sort_lines(su.make_lines(data.decode("utf-8")), case_insensitive=True)
+
+
+def test_bytes_lines_case_insensitive_non_ascii():
+    lines = ["Straße", "äpfel", "STRASSE", "Zebra", "Äpfel", "apfel", "ÄPFEL", "Ω"]
+    byte_lines = [line.encode("utf-8") for line in lines]
+
+    for order in [su.ASC, su.DESC]:
+        expected = su.sort_lines(lines, order, case_insensitive=True)
+        result = su.sort_lines(byte_lines, order, case_insensitive=True)
+        buffer = su.LineBuffer.from_lines(byte_lines, binary=True)
+
+        assert [line.decode("utf-8") for line in result] == expected
+        assert list(su.sort_lines(buffer, order, case_insensitive=True)) == result
+        assert su.sort_lines(byte_lines, order, True, limit=3) == result[:3]
+    assert [
+        line.decode("utf-8") for line in su.unique_lines(byte_lines, True)
+    ] == su.unique_lines(lines, True)
+
+
+def test_write_lines_in_chunks():
+    lines = _random_lines(5000)
+    chunks = []
+
+    class Recorder:
+        def write(self, chunk):
+            chunks.append(chunk)
+
+    text_output = io.StringIO()
+    su.write_lines(text_output, lines, "\n", buffer_size=1000)
+    su.write_lines(Recorder(), lines, "\n", buffer_size=1000)
+
+    assert text_output.getvalue() == "\n".join(lines)
+    assert b"".join(chunks) == "\n".join(lines).encode("utf-8")
+    assert len(chunks) > 10
+    assert max(map(len, chunks[1:])) < 3000
+
+
+def test_write_lines_to_socket_and_converts_types():
+    import socket
+
+    first, second = socket.socketpair()
+    with first, second:
+        su.write_lines(first, ["a", "b", "c"], ", ")
+        first.shutdown(socket.SHUT_WR)
+        assert second.recv(100) == b"a, b, c"
+
+    text_output = io.StringIO()
+    su.write_lines(text_output, [b"x", "é".encode("utf-8")], "\n")
+    su.write_lines(text_output, [], "\n")
+
+    assert text_output.getvalue() == "x\né"
@@ -1,3 +1,5 @@
+import io
+
 import pytest
 
 import core.terminal_commands as tc
@@ -97,3 +99,22 @@ def test_join_commands_in_one():
     result_2 = tc.join_commands_in_one(commands, ignore_errors=True)
 
     assert result_2 == "cd folder/one & git pull & git commit -m 'message'"
+
+
+def test_write_commands_in_one():
+    """
+    Tests if the write_commands_in_one function writes the same command as join_commands_in_one.
+
+    :return: None
+    """
+    commands = ["cd folder/one", "git pull", "git commit -m 'message'"]
+    output = io.StringIO()
+    binary_output = io.BytesIO()
+
+    tc.write_commands_in_one(output, commands)
+    tc.write_commands_in_one(binary_output, commands, ignore_errors=True)
+
+    assert output.getvalue() == tc.join_commands_in_one(commands)
+    assert binary_output.getvalue().decode() == tc.join_commands_in_one(
+        commands, ignore_errors=True
+    )
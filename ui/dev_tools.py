@@ -1,4 +1,5 @@
 import logging
+import multiprocessing
 
 from PySide6.QtWidgets import QApplication
 
@@ -25,4 +26,6 @@ def start_app() -> None:
 
 
 if __name__ == "__main__":
+    # Needed by the process pools of core.string_utils in the frozen app.
+    multiprocessing.freeze_support()
     start_app()
@@ -0,0 +1,66 @@
+from typing import Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class BackgroundTaskSignals(QObject):
+    """
+    Signals of a BackgroundTask. They are delivered in the thread that created
+    the task, so handlers can safely update widgets.
+    """
+
+    finished = Signal(object)
+    failed = Signal(str)
+
+
+class BackgroundTask(QRunnable):
+    """
+    A QRunnable that calls a function in a QThreadPool thread and reports its
+    result (or the error message) with signals.
+    """
+
+    def __init__(self, function: Callable[[], object]) -> None:
+        """
+        Initializes the BackgroundTask object.
+
+        :param function: The function to call in the background thread.
+        """
+        QRunnable.__init__(self)
+        self.signals = BackgroundTaskSignals()
+        self._function: Callable[[], object] = function
+
+    def run(self) -> None:
+        """
+        Calls the function and emits finished with its result, or failed with
+        the error message.
+        """
+        try:
+            result: object = self._function()
+        except Exception as ex:
+            self.signals.failed.emit(str(ex))
+        else:
+            self.signals.finished.emit(result)
+
+
+def run_in_background(
+    function: Callable[[], object],
+    on_finished: Callable[[object], None],
+    on_failed: Callable[[str], None] | None = None,
+) -> BackgroundTask:
+    """
+    Starts the function in the global QThreadPool.
+
+    The caller has to keep a reference to the returned task until it finishes,
+    otherwise its signals object can be garbage collected.
+
+    :param function: The function to call in the background thread.
+    :param on_finished: The handler of the function result.
+    :param on_failed: The handler of the error message. Default is no handler.
+    :return: The started task.
+    """
+    task: BackgroundTask = BackgroundTask(function)
+    task.signals.finished.connect(on_finished)
+    if on_failed is not None:
+        task.signals.failed.connect(on_failed)
+    QThreadPool.globalInstance().start(task)
+    return task
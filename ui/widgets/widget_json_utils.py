@@ -1,4 +1,15 @@
-from PySide6.QtCore import QRegularExpression
+import json
+from itertools import islice
+from typing import Iterator
+
+from PySide6.QtCore import (
+    QAbstractItemModel,
+    QModelIndex,
+    QPoint,
+    QRegularExpression,
+    QTimer,
+    Qt,
+)
 from PySide6.QtGui import QColor, QTextCharFormat, QFont, QSyntaxHighlighter
 from PySide6.QtGui import QIntValidator
 from PySide6.QtWidgets import (
@@ -9,58 +20,288 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QCheckBox,
     QDialogButtonBox,
+    QFileDialog,
+    QSplitter,
+    QTreeView,
 )
 from PySide6.QtWidgets import QPlainTextEdit
 from PySide6.QtWidgets import QWidget, QToolBar
 
 import core.json_utils as ju
+from ui.widgets.custom.custom_background_task import BackgroundTask, run_in_background
+
+# Blocks longer than this, such as minified documents, are not highlighted.
+HIGHLIGHT_MAX_BLOCK_LENGTH = 10_000
+# Number of blocks above and below the viewport that are highlighted in advance.
+HIGHLIGHT_MARGIN_BLOCKS = 100
+# The state of blocks whose highlighting waits until they are close to the viewport.
+_DEFERRED_BLOCK_STATE = 1
+# Number of invalid NDJSON records listed under the editor.
+NDJSON_ERRORS_SHOWN = 10
+# Number of children added to the tree every time a node asks for more.
+TREE_FETCH_SIZE = 256
+# Number of characters of scalar values shown in the tree.
+TREE_VALUE_LENGTH = 200
+# Milliseconds without edits after which the live mode validates the document.
+LIVE_VALIDATION_DELAY_MS = 400
+# The placeholder of the patch area of the diff mode.
+DIFF_PLACEHOLDER = "JSON Patch from the left to the right JSON"
 
 
 class JSONHighlighter(QSyntaxHighlighter):
     """
     A syntax highlighter for JSON data.
     Inherits from QSyntaxHighlighter.
+
+    Every block is scanned once with one precompiled expression. Blocks far from
+    the viewport of the editor are only marked as deferred and highlighted when
+    they are scrolled into view, and blocks longer than HIGHLIGHT_MAX_BLOCK_LENGTH,
+    such as minified documents, are not highlighted at all.
     """
 
-    def __init__(self, parent=None):
+    # Strings, numbers and literals, told apart by the captured group.
+    _TOKEN_EXPRESSION = QRegularExpression(
+        r'("(?:[^"\\]++|\\.)*+")'
+        r"|(-?\b[0-9]+(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?\b)"
+        r"|\b(true|false|null)\b"
+    )
+
+    def __init__(self, editor: QPlainTextEdit):
         """
         Initializes the JSONHighlighter object.
-        :param parent: The parent widget.
+        :param editor: The editor whose document is highlighted.
         """
-        super(JSONHighlighter, self).__init__(parent)
-        self.highlightingRules = []
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor("blue"))
-        keyword_format.setFontWeight(QFont.Bold)
-        keywords = ["true", "false", "null"]
-        for word in keywords:
-            pattern = QRegularExpression(r"\b" + word + r"\b")
-            self.highlightingRules.append((pattern, keyword_format))
+        super(JSONHighlighter, self).__init__(editor.document())
+        self._editor: QPlainTextEdit = editor
         string_format = QTextCharFormat()
         string_format.setForeground(QColor("red"))
-        self.highlightingRules.append((QRegularExpression(r"\".*\""), string_format))
         number_format = QTextCharFormat()
         number_format.setForeground(QColor("green"))
-        self.highlightingRules.append(
-            (
-                QRegularExpression(r"\b[-+]?[0-9]*\.?[0-9]+([eE][-+]?[0-9]+)?\b"),
-                number_format,
-            )
-        )
+        keyword_format = QTextCharFormat()
+        keyword_format.setForeground(QColor("blue"))
+        keyword_format.setFontWeight(QFont.Bold)
+        # Formats by the index of the captured group.
+        self._formats = (None, string_format, number_format, keyword_format)
+        # Numbers of the first and the last block highlighted right away.
+        self._highlighted_blocks: tuple[int, int] = (0, HIGHLIGHT_MARGIN_BLOCKS)
+        editor.updateRequest.connect(self._on_update_request)
 
     def highlightBlock(self, text):
         """
         Highlights the given text block.
         :param text: The text block to highlight.
         """
-        for pattern, format_rule in self.highlightingRules:
-            expression = QRegularExpression(pattern)
-            match_iterator = expression.globalMatch(text)
-            while match_iterator.hasNext():
-                match = match_iterator.next()
-                self.setFormat(
-                    match.capturedStart(), match.capturedLength(), format_rule
-                )
+        if len(text) > HIGHLIGHT_MAX_BLOCK_LENGTH:
+            self.setCurrentBlockState(-1)
+            return
+        first, last = self._highlighted_blocks
+        if not first <= self.currentBlock().blockNumber() <= last:
+            self.setCurrentBlockState(_DEFERRED_BLOCK_STATE)
+            return
+        self.setCurrentBlockState(-1)
+        match_iterator = self._TOKEN_EXPRESSION.globalMatch(text)
+        while match_iterator.hasNext():
+            match = match_iterator.next()
+            self.setFormat(
+                match.capturedStart(),
+                match.capturedLength(),
+                self._formats[match.lastCapturedIndex()],
+            )
+
+    def _on_update_request(self, rect, dy) -> None:
+        """
+        Highlights the deferred blocks that are close to the viewport after it
+        was scrolled, resized or repainted.
+        """
+        editor: QPlainTextEdit = self._editor
+        first: int = editor.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last: int = editor.cursorForPosition(
+            QPoint(0, editor.viewport().height())
+        ).blockNumber()
+        highlighted_blocks: tuple[int, int] = (
+            max(0, first - HIGHLIGHT_MARGIN_BLOCKS),
+            last + HIGHLIGHT_MARGIN_BLOCKS,
+        )
+        if highlighted_blocks == self._highlighted_blocks:
+            return
+        self._highlighted_blocks = highlighted_blocks
+        block = self.document().findBlockByNumber(highlighted_blocks[0])
+        while block.isValid() and block.blockNumber() <= highlighted_blocks[1]:
+            if block.userState() == _DEFERRED_BLOCK_STATE:
+                self.rehighlightBlock(block)
+            block = block.next()
+
+
+class _JsonTreeNode:
+    """
+    A node of JsonTreeModel: the span of a value in the document and the
+    children read so far.
+    """
+
+    __slots__ = ("parent", "row", "key", "start", "end", "children", "pending")
+
+    def __init__(
+        self,
+        parent: "_JsonTreeNode | None",
+        row: int,
+        key: str | None,
+        start: int,
+        end: int,
+    ) -> None:
+        self.parent: _JsonTreeNode | None = parent
+        self.row: int = row
+        self.key: str | None = key
+        self.start: int = start
+        self.end: int = end
+        self.children: list[_JsonTreeNode] = []
+        # The iterator of the children spans that are not read yet, None when all are read.
+        self.pending: Iterator[tuple[str | None, int, int]] | None = None
+
+
+class JsonTreeModel(QAbstractItemModel):
+    """
+    A lazy tree model of a JSON document.
+    Inherits from QAbstractItemModel.
+
+    Nodes keep only the spans of their values in the document text. Children of
+    a node are read with ju.iter_json_children when the node is expanded, in
+    pages of TREE_FETCH_SIZE as the view scrolls, so opening a huge document is
+    immediate and memory grows only with the nodes that were shown.
+    """
+
+    def __init__(self, json_string: str, parent=None):
+        """
+        Initializes the JsonTreeModel object.
+        :param json_string: The valid JSON document, see ju.check_json.
+        :param parent: The parent object.
+        """
+        super().__init__(parent)
+        self._json_string: str = json_string
+        self._root = _JsonTreeNode(None, 0, None, 0, len(json_string))
+        self._root.children.append(
+            _JsonTreeNode(
+                self._root, 0, None, _skip_whitespace(json_string, 0), len(json_string)
+            )
+        )
+
+    def index(self, row: int, column: int, parent=QModelIndex()) -> QModelIndex:
+        """
+        Returns the index of the child of the parent at the row and the column.
+        """
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self._node(parent).children[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        """
+        Returns the index of the parent of the item.
+        """
+        if not index.isValid():
+            return QModelIndex()
+        parent_node: _JsonTreeNode = index.internalPointer().parent
+        if parent_node is self._root:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """
+        Returns the number of children of the parent that were read so far.
+        """
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        """
+        Returns the number of columns: the key and the value.
+        """
+        return 2
+
+    def hasChildren(self, parent=QModelIndex()) -> bool:
+        """
+        Tells whether the parent is a non-empty object or array, without reading its children.
+        """
+        node: _JsonTreeNode = self._node(parent)
+        if node is self._root or node.children:
+            return True
+        if parent.column() > 0 or self._json_string[node.start] not in "[{":
+            return False
+        first_child: int = _skip_whitespace(self._json_string, node.start + 1)
+        return self._json_string[first_child] not in "]}"
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        """
+        Tells whether the parent has children that were not read yet.
+        """
+        node: _JsonTreeNode = self._node(parent)
+        return node.pending is not None or (
+            not node.children and self.hasChildren(parent)
+        )
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        """
+        Reads the next TREE_FETCH_SIZE children of the parent.
+        """
+        node: _JsonTreeNode = self._node(parent)
+        if node.pending is None:
+            if node.children:
+                return
+            node.pending = ju.iter_json_children(self._json_string, node.start)
+        spans: list[tuple[str | None, int, int]] = list(
+            islice(node.pending, TREE_FETCH_SIZE)
+        )
+        if len(spans) < TREE_FETCH_SIZE:
+            node.pending = None
+        if not spans:
+            return
+        first: int = len(node.children)
+        self.beginInsertRows(parent, first, first + len(spans) - 1)
+        node.children.extend(
+            _JsonTreeNode(node, row, key, start, end)
+            for row, (key, start, end) in enumerate(spans, first)
+        )
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        """
+        Returns the key or the value text of the item.
+        """
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        node: _JsonTreeNode = index.internalPointer()
+        if index.column() == 0:
+            if node.parent is self._root:
+                return "root"
+            return str(node.row) if node.key is None else node.key
+        first: str = self._json_string[node.start]
+        if first == "{" or first == "[":
+            return "{...}" if first == "{" else "[...]"
+        end: int = min(node.end, node.start + TREE_VALUE_LENGTH)
+        text: str = self._json_string[node.start : end]
+        return text if end == node.end else text + "..."
+
+    def headerData(self, section: int, orientation, role=Qt.ItemDataRole.DisplayRole):
+        """
+        Returns the titles of the columns.
+        """
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return ("Key", "Value")[section]
+        return None
+
+    def _node(self, index: QModelIndex) -> _JsonTreeNode:
+        return index.internalPointer() if index.isValid() else self._root
+
+
+def _skip_whitespace(json_string: str, position: int) -> int:
+    """
+    Returns the position of the first character after the whitespace at the position.
+    """
+    while json_string[position] in " \t\n\r":
+        position += 1
+    return position
 
 
 class JsonFormatDialog(QDialog):
@@ -135,16 +376,76 @@ class WidgetJsonUtils(QWidget):
         self._json_toolbar.addAction("Format", self.format_handler)
         self._json_toolbar.addAction("Flat", self.flat_handler)
         self._json_toolbar.addAction("Validate", self.validate_handler)
+        self._json_toolbar.addAction("Paths", self.paths_handler)
+        self._json_toolbar.addAction("Unflatten Paths", self.unflatten_paths_handler)
+        self._ndjson_action = self._json_toolbar.addAction("NDJSON")
+        self._ndjson_action.setCheckable(True)
+        self._ndjson_action.setToolTip(
+            "Process every line as a separate JSON record (JSON Lines)"
+        )
+        self._tree_action = self._json_toolbar.addAction("Tree")
+        self._tree_action.setCheckable(True)
+        self._tree_action.triggered.connect(self.tree_handler)
+        self._json_toolbar.addAction("Open as Tree...", self.open_tree_handler)
+        self._live_action = self._json_toolbar.addAction("Live")
+        self._live_action.setCheckable(True)
+        self._live_action.setToolTip("Validate the JSON while it is edited")
+        self._live_action.toggled.connect(self.live_handler)
+        self._diff_action = self._json_toolbar.addAction("Diff")
+        self._diff_action.setCheckable(True)
+        self._diff_action.setToolTip(
+            "Compare the JSON with a second document side by side"
+        )
+        self._diff_action.toggled.connect(self.diff_handler)
+        self._compare_action = self._json_toolbar.addAction(
+            "Compare", self.compare_handler
+        )
+        self._compare_action.setEnabled(False)
 
         self._json_editor: QPlainTextEdit = QPlainTextEdit()
-        JSONHighlighter(self._json_editor.document())
+        self._highlighter = JSONHighlighter(self._json_editor)
+        self._json_editor.document().contentsChange.connect(self._on_contents_change)
+
+        # The live mode checks one text at a time in the background, edits made
+        # meanwhile are merged into one and checked after it.
+        self._edit_checker = ju.JsonEditChecker()
+        self._pending_edit: tuple[int, int, int] | None = None
+        self._live_task: BackgroundTask | None = None
+        self._live_generation: int = 0
+        self._live_timer = QTimer(self)
+        self._live_timer.setSingleShot(True)
+        self._live_timer.setInterval(LIVE_VALIDATION_DELAY_MS)
+        self._live_timer.timeout.connect(self._start_live_validation)
+
+        self._json_tree: QTreeView = QTreeView()
+        # Rows of equal height let the view skip measuring the children it adds.
+        self._json_tree.setUniformRowHeights(True)
+        self._json_tree.hide()
+        self._tree_model: JsonTreeModel | None = None
+        self._tree_task: BackgroundTask | None = None
+
+        self._new_json_editor: QPlainTextEdit = QPlainTextEdit()
+        self._new_json_editor.setPlaceholderText("New JSON to compare with")
+        self._new_highlighter = JSONHighlighter(self._new_json_editor)
+        self._diff_output = QPlainTextEdit()
+        self._diff_output.setReadOnly(True)
+        self._diff_output.setPlaceholderText(DIFF_PLACEHOLDER)
+        self._panes_splitter = QSplitter(Qt.Orientation.Horizontal)
+        self._panes_splitter.addWidget(self._json_editor)
+        self._panes_splitter.addWidget(self._new_json_editor)
+        self._new_json_editor.hide()
+        self._diff_output.hide()
+        self._diff_task: BackgroundTask | None = None
+        self._diff_generation: int = 0
 
         self._error_label = QLabel()
         self._error_label.setStyleSheet("color: red; font-weight: bold;")
 
         self._widget_layout = QVBoxLayout()
         self._widget_layout.addWidget(self._json_toolbar)
-        self._widget_layout.addWidget(self._json_editor)
+        self._widget_layout.addWidget(self._panes_splitter)
+        self._widget_layout.addWidget(self._json_tree)
+        self._widget_layout.addWidget(self._diff_output)
         self._widget_layout.addWidget(self._error_label)
         self.setLayout(self._widget_layout)
 
@@ -179,7 +480,17 @@ class WidgetJsonUtils(QWidget):
         Handles the format action.
         """
         content: str = self._json_editor.toPlainText()
-        if content and len(content) > 0:
+        if content and len(content) > 0 and self._ndjson_action.isChecked():
+            dialog = JsonFormatDialog()
+            dialog.show()
+            if dialog.exec() == QDialog.DialogCode.Accepted:
+                self._process_ndjson(
+                    content,
+                    ju.NDJSON_FORMAT,
+                    indentation=dialog.indentation,
+                    sort_keys=dialog.sort_keys,
+                )
+        elif content and len(content) > 0:
             result: str = ju.validate_json(content)
             if len(result) == 0:
                 dialog = JsonFormatDialog()
@@ -199,7 +510,9 @@ class WidgetJsonUtils(QWidget):
         Handles the flat action.
         """
         content: str = self._json_editor.toPlainText()
-        if content and len(content) > 0:
+        if content and len(content) > 0 and self._ndjson_action.isChecked():
+            self._process_ndjson(content, ju.NDJSON_FLATTEN)
+        elif content and len(content) > 0:
             result: str = ju.validate_json(content)
             if len(result) == 0:
                 json_flatten = ju.flatten_json(content)
@@ -207,12 +520,46 @@ class WidgetJsonUtils(QWidget):
             else:
                 self._error_label.setText(result)
 
+    def paths_handler(self) -> None:
+        """
+        Handles the paths action: flattens the content into an object of dotted paths.
+        """
+        content: str = self._json_editor.toPlainText()
+        if not content:
+            self._error_label.setText("No Content")
+            return
+        try:
+            flattened: str = ju.flatten_json_paths(content)
+        except json.JSONDecodeError as e:
+            self._error_label.setText(e.__str__())
+            return
+        self._error_label.setText("")
+        self._json_editor.setPlainText(flattened)
+
+    def unflatten_paths_handler(self) -> None:
+        """
+        Handles the unflatten paths action: builds the document of an object of dotted paths.
+        """
+        content: str = self._json_editor.toPlainText()
+        if not content:
+            self._error_label.setText("No Content")
+            return
+        try:
+            document: str = ju.unflatten_json_paths(content)
+        except (json.JSONDecodeError, ju.JsonPathIsInvalidException) as e:
+            self._error_label.setText(e.__str__())
+            return
+        self._error_label.setText("")
+        self._json_editor.setPlainText(document)
+
     def validate_handler(self) -> None:
         """
         Handles the validate action.
         """
         content: str = self._json_editor.toPlainText()
-        if content and len(content) > 0:
+        if content and len(content) > 0 and self._ndjson_action.isChecked():
+            self._process_ndjson(content, ju.NDJSON_VALIDATE)
+        elif content and len(content) > 0:
             result: str = ju.validate_json(content)
             if result and len(result) > 0:
                 self._error_label.setText(result)
@@ -220,3 +567,226 @@ class WidgetJsonUtils(QWidget):
                 self._error_label.setText("")
         else:
             self._error_label.setText("No Content")
+
+    def _process_ndjson(
+        self, content: str, mode: str, indentation: int = 4, sort_keys: bool = True
+    ) -> None:
+        """
+        Processes the content as NDJSON records and replaces it with the result
+        when all records are valid, otherwise lists the invalid records.
+        :param content: The NDJSON content of the editor.
+        :param mode: One of ju.NDJSON_VALIDATE, ju.NDJSON_FORMAT or ju.NDJSON_FLATTEN.
+        :param indentation: The indentation of formatted records.
+        :param sort_keys: Whether to sort the keys of formatted records.
+        """
+        output, errors = ju.process_ndjson(
+            content, mode, indentation=indentation, sort_keys=sort_keys
+        )
+        if errors:
+            messages: list[str] = [
+                "Line {}: {}".format(line_number, message)
+                for line_number, message in errors[:NDJSON_ERRORS_SHOWN]
+            ]
+            if len(errors) > NDJSON_ERRORS_SHOWN:
+                messages.append(
+                    "... and {} more invalid records".format(
+                        len(errors) - NDJSON_ERRORS_SHOWN
+                    )
+                )
+            self._error_label.setText("\n".join(messages))
+            return
+        self._error_label.setText("")
+        if mode != ju.NDJSON_VALIDATE:
+            self._json_editor.setPlainText(output)
+
+    def tree_handler(self, checked: bool) -> None:
+        """
+        Handles the tree action: shows the content of the editor as a lazy tree,
+        or goes back to the editor.
+        :param checked: Whether the tree action is checked.
+        """
+        if not checked:
+            self._show_editor()
+            return
+        content: str = self._json_editor.toPlainText()
+        if not content:
+            self._tree_action.setChecked(False)
+            self._error_label.setText("No Content")
+            return
+        try:
+            ju.check_json(content)
+        except json.JSONDecodeError as e:
+            self._tree_action.setChecked(False)
+            self._error_label.setText(e.__str__())
+            return
+        self._show_tree(content)
+
+    def open_tree_handler(self) -> None:
+        """
+        Handles the open as tree action: reads and checks a JSON file in a background
+        thread and shows it as a lazy tree, without loading it into the editor.
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Open JSON File")
+        if not path:
+            return
+        self._error_label.setText("Reading {}...".format(path))
+        self._tree_task = run_in_background(
+            lambda: _read_json_file(path), self._show_tree, self._show_tree_error
+        )
+
+    def live_handler(self, checked: bool) -> None:
+        """
+        Handles the live action: validates the content in a background thread every
+        time it was not edited for LIVE_VALIDATION_DELAY_MS milliseconds.
+        :param checked: Whether the live action is checked.
+        """
+        # Results of validations started before are not shown anymore.
+        self._live_generation += 1
+        self._live_timer.stop()
+        if checked:
+            self._start_live_validation()
+        else:
+            self._error_label.setText("")
+
+    def _on_contents_change(self, position: int, removed: int, added: int) -> None:
+        # Edits are tracked even when the live mode is off, so the checker
+        # can resume from its last state when it is turned on.
+        self._pending_edit = ju.merge_edits(
+            self._pending_edit, position, removed, added
+        )
+        if self._live_action.isChecked():
+            self._live_generation += 1
+            self._live_timer.start()
+
+    def _start_live_validation(self) -> None:
+        if self._live_task is not None:
+            # The check of an older text is running, this one starts when it finishes.
+            return
+        if self._ndjson_action.isChecked():
+            self._error_label.setText("")
+            return
+        content: str = self._json_editor.toPlainText()
+        edit: tuple[int, int, int] | None = self._pending_edit
+        self._pending_edit = None
+        generation: int = self._live_generation
+        checker: ju.JsonEditChecker = self._edit_checker
+        self._live_task = run_in_background(
+            lambda: (generation, _check_json_edit(checker, content, edit)),
+            self._on_live_validation_finished,
+            self._on_live_validation_failed,
+        )
+
+    def _on_live_validation_finished(self, result: tuple[int, str]) -> None:
+        self._live_task = None
+        generation, message = result
+        if generation == self._live_generation:
+            self._error_label.setText(message)
+        elif self._live_action.isChecked() and not self._live_timer.isActive():
+            # The text was edited during the check and the delay has passed.
+            self._start_live_validation()
+
+    def _on_live_validation_failed(self, message: str) -> None:
+        self._live_task = None
+        self._error_label.setText(message)
+
+    def diff_handler(self, checked: bool) -> None:
+        """
+        Handles the diff action: shows or hides the second editor and the patch area.
+        :param checked: Whether the diff action is checked.
+        """
+        self._new_json_editor.setVisible(checked)
+        self._diff_output.setVisible(checked)
+        self._compare_action.setEnabled(checked)
+        if not checked:
+            # Results of comparisons started before are not shown anymore.
+            self._diff_generation += 1
+
+    def compare_handler(self) -> None:
+        """
+        Handles the compare action: computes the structural diff of the two editors
+        in a background thread and shows it as a JSON Patch.
+        """
+        old_json: str = self._json_editor.toPlainText()
+        new_json: str = self._new_json_editor.toPlainText()
+        if not old_json or not new_json:
+            self._error_label.setText("No Content")
+            return
+        self._diff_generation += 1
+        generation: int = self._diff_generation
+        self._error_label.setText("")
+        self._diff_output.setPlainText("")
+        self._diff_output.setPlaceholderText("Comparing...")
+        self._diff_task = run_in_background(
+            lambda: (generation, *_diff_json_texts(old_json, new_json)),
+            self._on_compare_finished,
+            self._on_compare_failed,
+        )
+
+    def _on_compare_finished(self, result: tuple[int, str, int]) -> None:
+        generation, patch, count = result
+        if generation != self._diff_generation:
+            # A newer comparison has been started, this result is stale.
+            return
+        self._diff_output.setPlaceholderText(DIFF_PLACEHOLDER)
+        self._diff_output.setPlainText(patch)
+        self._error_label.setText(
+            "Documents are equal" if not count else "{} changes".format(count)
+        )
+
+    def _on_compare_failed(self, message: str) -> None:
+        self._diff_output.setPlaceholderText(DIFF_PLACEHOLDER)
+        self._error_label.setText(message)
+
+    def _show_tree(self, json_string: str) -> None:
+        self._error_label.setText("")
+        self._tree_model = JsonTreeModel(json_string, self._json_tree)
+        self._json_tree.setModel(self._tree_model)
+        self._json_tree.expand(self._tree_model.index(0, 0))
+        self._tree_action.setChecked(True)
+        self._panes_splitter.hide()
+        self._json_tree.show()
+
+    def _show_tree_error(self, message: str) -> None:
+        self._error_label.setText(message)
+
+    def _show_editor(self) -> None:
+        self._json_tree.hide()
+        self._panes_splitter.show()
+        # The model keeps the document text alive.
+        self._json_tree.setModel(None)
+        self._tree_model = None
+
+
+def _diff_json_texts(old_json: str, new_json: str) -> tuple[str, int]:
+    """
+    Returns the JSON Patch from the old to the new JSON as text and the number
+    of its operations.
+    """
+    operations: list[dict] = ju.diff_json(old_json, new_json)
+    return ju.dump_json(operations), len(operations)
+
+
+def _check_json_edit(
+    checker: ju.JsonEditChecker, content: str, edit: tuple[int, int, int] | None
+) -> str:
+    """
+    Checks the edited content and returns the error message with its position,
+    or an empty string if the content is valid or empty.
+    """
+    try:
+        # Empty content is checked too, so the checker follows every edit. Positions
+        # of contentsChange count UTF-16 code units.
+        checker.check(content, edit, utf16=True)
+    except json.JSONDecodeError as e:
+        return e.__str__() if content else ""
+    return ""
+
+
+def _read_json_file(path: str) -> str:
+    """
+    Reads a UTF-8 JSON file and checks its syntax.
+    """
+    with open(path, "r", encoding="utf-8") as json_file:
+        json_string: str = json_file.read()
+    ju.check_json(json_string)
+    return json_string
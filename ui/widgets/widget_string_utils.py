@@ -1,3 +1,7 @@
+from typing import Callable, Iterator
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QIntValidator
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -7,9 +11,19 @@ from PySide6.QtWidgets import (
     QDialogButtonBox,
     QLabel,
     QLineEdit,
+    QFileDialog,
+    QSplitter,
+    QFormLayout,
+    QComboBox,
+    QCheckBox,
 )
 
 import core.string_utils as su
+from ui.widgets.custom.custom_background_task import BackgroundTask, run_in_background
+
+PREVIEW_LINES = 1000
+PREVIEW_LINE_LENGTH = 1000
+FILE_MAX_DISTINCT_LINES = 1_000_000
 
 
 class SeparatorDialog(QDialog):
@@ -52,6 +66,142 @@ class SeparatorDialog(QDialog):
         return self._separator_line_edit.text()
 
 
+class PipelineDialog(QDialog):
+    """
+    A custom QDialog for building a chain of line operations.
+
+    The chain always runs in the same order: split, sort, remove duplicates,
+    limit and join, and every step except splitting and joining is optional.
+    """
+
+    def __init__(self):
+        """
+        Initializes the PipelineDialog instance.
+
+        This method creates the user interface elements and adds them to the layout.
+        """
+        QDialog.__init__(self)
+        self.setWindowTitle("Build Lines Pipeline")
+        self._dialog_layout = QVBoxLayout(self)
+        self._form_layout = QFormLayout()
+        self._split_line_edit = QLineEdit()
+        self._split_line_edit.setPlaceholderText("New line")
+        self._sort_combo_box = QComboBox()
+        self._sort_combo_box.addItem("No sorting", None)
+        self._sort_combo_box.addItem("Ascending", su.ASC)
+        self._sort_combo_box.addItem("Descending", su.DESC)
+        self._unique_checkbox = QCheckBox()
+        self._ignore_case_checkbox = QCheckBox()
+        self._limit_line_edit = QLineEdit()
+        self._limit_line_edit.setValidator(QIntValidator(0, 2**31 - 1))
+        self._limit_line_edit.setPlaceholderText("All lines")
+        self._join_line_edit = QLineEdit()
+        self._join_line_edit.setPlaceholderText("New line")
+        self._form_layout.addRow("Split by:", self._split_line_edit)
+        self._form_layout.addRow("Sort:", self._sort_combo_box)
+        self._form_layout.addRow("Remove duplicates:", self._unique_checkbox)
+        self._form_layout.addRow("Ignore case:", self._ignore_case_checkbox)
+        self._form_layout.addRow("Limit:", self._limit_line_edit)
+        self._form_layout.addRow("Join with:", self._join_line_edit)
+        self._dialog_layout.addLayout(self._form_layout)
+        self._dialog_button_box = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        self._dialog_layout.addWidget(self._dialog_button_box)
+        self._dialog_button_box.accepted.connect(self.accept)
+        self._dialog_button_box.rejected.connect(self.reject)
+
+    @property
+    def pipeline(self) -> su.LinePipeline:
+        """
+        Returns the pipeline built from the chosen steps.
+
+        :return: The pipeline to run.
+        """
+        ignore_case: bool = self._ignore_case_checkbox.isChecked()
+        pipeline = su.LinePipeline(self._split_line_edit.text() or "\n")
+        order: str | None = self._sort_combo_box.currentData()
+        if order is not None:
+            pipeline.sort(order, case_insensitive=ignore_case)
+        if self._unique_checkbox.isChecked():
+            pipeline.unique(case_insensitive=ignore_case)
+        if self._limit_line_edit.text():
+            pipeline.limit(int(self._limit_line_edit.text()))
+        return pipeline
+
+    @property
+    def join_separator(self) -> str:
+        """
+        Returns the separator to join the resulting lines with.
+
+        :return: The text entered in the join input field, or a new line if it is empty.
+        """
+        return self._join_line_edit.text() or "\n"
+
+
+class FilterDialog(QDialog):
+    """
+    A custom QDialog for filtering lines by a list of patterns.
+
+    This dialog contains a text area for patterns, one per line, the filter mode
+    and the case sensitivity, as well as OK and Cancel buttons.
+    """
+
+    def __init__(self):
+        """
+        Initializes the FilterDialog instance.
+
+        This method creates the user interface elements and adds them to the layout.
+        """
+        QDialog.__init__(self)
+        self.setWindowTitle("Filter Lines")
+        self._dialog_layout = QVBoxLayout(self)
+        self._form_layout = QFormLayout()
+        self._patterns_text_edit = QPlainTextEdit()
+        self._patterns_text_edit.setPlaceholderText("One pattern per line")
+        self._mode_combo_box = QComboBox()
+        self._mode_combo_box.addItem("Keep lines with any pattern", su.FILTER_INCLUDE)
+        self._mode_combo_box.addItem("Drop lines with any pattern", su.FILTER_EXCLUDE)
+        self._ignore_case_checkbox = QCheckBox()
+        self._form_layout.addRow("Patterns:", self._patterns_text_edit)
+        self._form_layout.addRow("Mode:", self._mode_combo_box)
+        self._form_layout.addRow("Ignore case:", self._ignore_case_checkbox)
+        self._dialog_layout.addLayout(self._form_layout)
+        self._dialog_button_box = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        self._dialog_layout.addWidget(self._dialog_button_box)
+        self._dialog_button_box.accepted.connect(self.accept)
+        self._dialog_button_box.rejected.connect(self.reject)
+
+    @property
+    def patterns(self) -> list[str]:
+        """
+        Returns the non-empty patterns entered in the text area.
+
+        :return: The list of patterns.
+        """
+        return su.make_lines(self._patterns_text_edit.toPlainText())
+
+    @property
+    def mode(self) -> str:
+        """
+        Returns the chosen filter mode.
+
+        :return: Either FILTER_INCLUDE or FILTER_EXCLUDE.
+        """
+        return self._mode_combo_box.currentData()
+
+    @property
+    def ignore_case(self) -> bool:
+        """
+        Returns whether the patterns are matched case-insensitively.
+
+        :return: The state of the ignore case checkbox.
+        """
+        return self._ignore_case_checkbox.isChecked()
+
+
 class WidgetStringUtils(QWidget):
     """
     A custom QWidget for performing string manipulation actions.
@@ -60,6 +210,17 @@ class WidgetStringUtils(QWidget):
     and clearing text in a text area. It also has actions for creating lines from
     the text and sorting them in ascending or descending order, with or without
     case sensitivity.
+
+    In the two panes mode a second text area is shown, and set operations
+    (intersection, difference, symmetric difference and union) of the lines
+    of both areas are computed in a background thread into a result area.
+
+    Sorting keeps a sorted model of the lines. Edits made after a sort update the
+    model line by line, so the next sort of the same text does not sort it again.
+
+    A file can be opened instead of pasting its content. The file is memory-mapped,
+    actions work on the mapping, only a preview is shown in the text area and the
+    result is written straight to the file chosen with "Save Result...".
     """
 
     def __init__(self):
@@ -70,13 +231,46 @@ class WidgetStringUtils(QWidget):
         """
         super().__init__()
         self._text_edit_widget = QPlainTextEdit()
+        self._file_label = QLabel()
+        self._file_label.hide()
+        self._file_buffer: su.LineBuffer | None = None
+        self._file_lines: su.LineBuffer | None = None
+        self._file_join_separator: str = "\n"
+        self._file_path: str = ""
+        self._file_task: BackgroundTask | None = None
+        self._file_generation: int = 0
+
+        self._sorted_model: su.SortedLinesModel | None = None
+        self._rendered_lines: list[str] = []
+        self._rendered_block_count: int = 0
+        self._rendering: bool = False
+        self._text_edit_widget.document().contentsChange.connect(
+            self._on_contents_change
+        )
+
+        self._second_text_edit_widget = QPlainTextEdit()
+        self._second_text_edit_widget.setPlaceholderText("Second list of lines")
+        self._result_text_edit_widget = QPlainTextEdit()
+        self._result_text_edit_widget.setReadOnly(True)
+        self._result_text_edit_widget.setPlaceholderText("Result of set operation")
+        self._panes_splitter = QSplitter(Qt.Orientation.Horizontal)
+        self._panes_splitter.addWidget(self._text_edit_widget)
+        self._panes_splitter.addWidget(self._second_text_edit_widget)
+        self._second_text_edit_widget.hide()
+        self._result_text_edit_widget.hide()
+        self._set_operation_task: BackgroundTask | None = None
+        self._set_operation_generation: int = 0
 
         self._action_toolbar = QToolBar("String Actions Toolbar")
+        self._action_toolbar.addAction("Open File...", self.open_file)
+        self._action_toolbar.addAction("Save Result...", self.save_result)
         self._action_toolbar.addAction("Copy", self.copy_text)
         self._action_toolbar.addAction("Paste", self.paste_text)
         self._action_toolbar.addAction("Cut", self.cut_text)
         self._action_toolbar.addAction("Clear", self.clear_text_area)
         self._action_toolbar.addAction("Create Lines", self.make_lines)
+        self._action_toolbar.addAction("Pipeline...", self.run_pipeline)
+        self._action_toolbar.addAction("Filter Lines...", self.filter_lines)
         self._action_toolbar.addAction(
             "Sort Asc", lambda: self.sort_lines(su.ASC, False)
         )
@@ -89,10 +283,43 @@ class WidgetStringUtils(QWidget):
         self._action_toolbar.addAction(
             "Sort Lines Desc Ignore Case", lambda: self.sort_lines(su.DESC, True)
         )
+        self._action_toolbar.addAction("Unique Lines", lambda: self.unique_lines(False))
+        self._action_toolbar.addAction(
+            "Unique Lines Ignore Case", lambda: self.unique_lines(True)
+        )
+        self._action_toolbar.addAction("Count Lines", lambda: self.count_lines(False))
+        self._action_toolbar.addAction(
+            "Count Lines Ignore Case", lambda: self.count_lines(True)
+        )
+        self._two_panes_action = self._action_toolbar.addAction(
+            "Two Panes", self.toggle_two_panes
+        )
+        self._two_panes_action.setCheckable(True)
+
+        self._set_toolbar = QToolBar("Set Operations Toolbar")
+        self._set_toolbar.addAction(
+            "Intersection", lambda: self.run_set_operation(su.intersection_lines)
+        )
+        self._set_toolbar.addAction(
+            "Difference", lambda: self.run_set_operation(su.difference_lines)
+        )
+        self._set_toolbar.addAction(
+            "Symmetric Difference",
+            lambda: self.run_set_operation(su.symmetric_difference_lines),
+        )
+        self._set_toolbar.addAction(
+            "Union", lambda: self.run_set_operation(su.union_lines)
+        )
+        self._set_ignore_case_action = self._set_toolbar.addAction("Ignore Case")
+        self._set_ignore_case_action.setCheckable(True)
+        self._set_toolbar.hide()
 
         self.mainLayout = QVBoxLayout()
         self.mainLayout.addWidget(self._action_toolbar)
-        self.mainLayout.addWidget(self._text_edit_widget)
+        self.mainLayout.addWidget(self._set_toolbar)
+        self.mainLayout.addWidget(self._file_label)
+        self.mainLayout.addWidget(self._panes_splitter)
+        self.mainLayout.addWidget(self._result_text_edit_widget)
         self.setLayout(self.mainLayout)
 
     def copy_text(self) -> None:
@@ -118,10 +345,149 @@ class WidgetStringUtils(QWidget):
     def clear_text_area(self) -> None:
         """
         Selects all text in the text edit widget and clears it.
+        Closes the opened file, if any.
         """
+        self._close_file()
+        self._sorted_model = None
         self._text_edit_widget.selectAll()
         self._text_edit_widget.clear()
 
+    def open_file(self) -> None:
+        """
+        Opens a dialog to choose a file, memory-maps it and shows a preview of
+        its beginning. Until the text area is cleared, actions work on the file.
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Open File")
+        if not path:
+            return
+        self._close_file()
+        try:
+            self._file_buffer = su.open_mapped_file(path)
+        except OSError as ex:
+            self._file_label.setText("Cannot open {}: {}".format(path, ex))
+            self._file_label.show()
+            return
+        self._file_path = path
+        self._file_label.setText("File: {}".format(path))
+        self._file_label.show()
+        self._text_edit_widget.setReadOnly(True)
+        self._show_preview(self._current_file_lines())
+
+    def save_result(self) -> None:
+        """
+        Opens a dialog to choose a file and writes the result of the actions
+        applied to the opened file, or the content of the text edit widget,
+        into it in chunks, without building the whole result in memory.
+        """
+        if self._file_busy():
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save Result")
+        if not path:
+            return
+        try:
+            if self._file_buffer is None:
+                with open(path, "w", encoding="utf-8") as output:
+                    su.write_lines(output, self._iter_text_lines(), "\n")
+            else:
+                with open(path, "wb") as output:
+                    self._current_file_lines().write_to(
+                        output, self._file_join_separator
+                    )
+        except OSError as ex:
+            self._file_label.setText("Cannot save {}: {}".format(path, ex))
+            self._file_label.show()
+
+    def _iter_text_lines(self) -> Iterator[str]:
+        """
+        Yields the lines of the text edit widget block by block, without copying
+        the whole text as toPlainText does.
+        """
+        block = self._text_edit_widget.document().begin()
+        while block.isValid():
+            yield block.text()
+            block = block.next()
+
+    def _current_file_lines(self) -> su.LineBuffer:
+        """
+        Returns the lines of the opened file, splitting it by newlines if no
+        action has been applied yet.
+        """
+        if self._file_lines is None:
+            self._file_lines = su.make_lines(self._file_buffer, separator="\n")
+        return self._file_lines
+
+    def _show_preview(self, buffer: su.LineBuffer) -> None:
+        """
+        Shows the first lines of the buffer in the text edit widget.
+        """
+        preview: list[bytes] = buffer.head(PREVIEW_LINES, PREVIEW_LINE_LENGTH)
+        text: str = b"\n".join(preview).decode("utf-8", "replace")
+        if len(buffer) > PREVIEW_LINES:
+            text += "\n... ({} lines in total)".format(len(buffer))
+        self._set_text(text)
+
+    def _file_busy(self) -> bool:
+        """
+        Returns whether an action is being applied to the opened file, in which case
+        the next one has to wait for its result.
+        """
+        if self._file_task is None:
+            return False
+        self._file_label.setText(
+            "File: {} (busy, wait for the result)".format(self._file_path)
+        )
+        return True
+
+    def _run_file_action(
+        self, action: Callable[[su.LineBuffer], su.LineBuffer]
+    ) -> None:
+        """
+        Applies an action to the lines of the opened file in a background thread,
+        so the window stays responsive while a large file is processed, and shows
+        the preview of the result when it is ready.
+        """
+        buffer: su.LineBuffer = self._file_buffer
+        lines: su.LineBuffer | None = self._file_lines
+        self._file_generation += 1
+        generation: int = self._file_generation
+        self._file_label.setText("File: {} (working...)".format(self._file_path))
+        self._file_task = run_in_background(
+            lambda: (generation, _apply_file_action(action, buffer, lines)),
+            self._on_file_action_finished,
+            lambda message: self._on_file_action_failed(generation, message),
+        )
+
+    def _on_file_action_finished(self, result: tuple[int, su.LineBuffer]) -> None:
+        generation, lines = result
+        if generation != self._file_generation:
+            # The file has been closed meanwhile, this result is stale.
+            return
+        self._file_task = None
+        self._file_lines = lines
+        self._file_label.setText("File: {}".format(self._file_path))
+        self._show_preview(lines)
+
+    def _on_file_action_failed(self, generation: int, message: str) -> None:
+        if generation != self._file_generation:
+            return
+        self._file_task = None
+        self._file_label.setText("File: {} ({})".format(self._file_path, message))
+
+    def _close_file(self) -> None:
+        """
+        Releases the opened file and returns the widget to the text mode.
+        """
+        # The result of a running action is dropped when it arrives.
+        self._file_generation += 1
+        self._file_task = None
+        if self._file_buffer is not None:
+            self._file_buffer.close()
+        self._file_buffer = None
+        self._file_lines = None
+        self._file_join_separator = "\n"
+        self._file_label.hide()
+        self._text_edit_widget.setReadOnly(False)
+
     def make_lines(self) -> None:
         """
         Opens a dialog to get a separator character from the user. Splits
@@ -132,15 +498,82 @@ class WidgetStringUtils(QWidget):
         :param self: The instance of this class that is calling this method
         :return: None
         """
+        if self._file_buffer is not None and self._file_busy():
+            return
         dialog = SeparatorDialog()
         dialog.show()
         if dialog.exec() == QDialog.DialogCode.Accepted:
+            if self._file_buffer is not None:
+                self._file_lines = su.make_lines(
+                    self._file_buffer, separator=dialog.separator
+                )
+                self._show_preview(self._file_lines)
+                return
             text: str = self._text_edit_widget.toPlainText()
             non_sorted_lines: list[str] = su.make_lines(
                 text, separator=dialog.separator
             )
             result = su.join_lines(non_sorted_lines, "\n")
-            self._text_edit_widget.setPlainText(result)
+            self._set_text(result)
+
+    def run_pipeline(self) -> None:
+        """
+        Opens a dialog to build a chain of line operations and applies the whole
+        chain in one pass: the text is read and split once and the result is set
+        once, instead of once per operation. For an opened file, the join
+        separator is used by "Save Result...".
+
+        :param self: The instance of this class that is calling this method
+        :return: None
+        """
+        if self._file_buffer is not None and self._file_busy():
+            return
+        dialog = PipelineDialog()
+        dialog.show()
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        if self._file_buffer is not None:
+            self._file_lines = dialog.pipeline.lines(self._file_buffer)
+            self._file_join_separator = dialog.join_separator
+            self._show_preview(self._file_lines)
+            return
+        text: str = self._text_edit_widget.toPlainText()
+        result: str = dialog.pipeline.run(text, separator=dialog.join_separator)
+        self._set_text(result)
+
+    def filter_lines(self) -> None:
+        """
+        Opens a dialog to get a list of patterns from the user and keeps only
+        lines that contain any of them, or only lines that contain none of them.
+
+        :param self: The instance of this class that is calling this method
+        :return: None
+        """
+        if self._file_buffer is not None and self._file_busy():
+            return
+        dialog = FilterDialog()
+        dialog.show()
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        if self._file_buffer is not None:
+            self._file_lines = su.filter_lines(
+                self._current_file_lines(),
+                dialog.patterns,
+                mode=dialog.mode,
+                case_insensitive=dialog.ignore_case,
+            )
+            self._show_preview(self._file_lines)
+            return
+        text: str = self._text_edit_widget.toPlainText()
+        lines: list[str] = su.make_lines(text)
+        filtered: list[str] = su.filter_lines(
+            lines,
+            dialog.patterns,
+            mode=dialog.mode,
+            case_insensitive=dialog.ignore_case,
+        )
+        result: str = su.join_lines(filtered, "\n")
+        self._set_text(result)
 
     def sort_lines(self, direction: str, ignore_case: bool = False) -> None:
         """
@@ -152,10 +585,224 @@ class WidgetStringUtils(QWidget):
         :param ignore_case: Whether or not to ignore case when sorting lines (default False)
         :return: None
         """
-        text: str = self._text_edit_widget.toPlainText()
-        non_sorted_lines: list[str] = su.make_lines(text)
-        sorted_lines: list[str] = su.sort_lines(
-            non_sorted_lines, order=direction, case_insensitive=ignore_case
+        if self._file_buffer is not None:
+            if not self._file_busy():
+                self._run_file_action(
+                    lambda lines: _sort_file_lines(lines, direction, ignore_case)
+                )
+            return
+        if self._sorted_model is None:
+            text: str = self._text_edit_widget.toPlainText()
+            self._sorted_model = su.SortedLinesModel(su.make_lines(text))
+        sorted_lines: list[str] = self._sorted_model.view(
+            order=direction, case_insensitive=ignore_case
         )
         result: str = su.join_lines(sorted_lines, "\n")
-        self._text_edit_widget.setPlainText(result)
+        self._rendering = True
+        try:
+            self._text_edit_widget.setPlainText(result)
+        finally:
+            self._rendering = False
+        self._rendered_lines = sorted_lines if sorted_lines else [""]
+        self._rendered_block_count = self._text_edit_widget.document().blockCount()
+
+    def _set_text(self, text: str) -> None:
+        """
+        Replaces the text of the text edit widget with the result of an action
+        other than sorting, dropping the sorted model.
+        """
+        self._sorted_model = None
+        self._text_edit_widget.setPlainText(text)
+
+    def _on_contents_change(self, position: int, removed: int, added: int) -> None:
+        """
+        Applies an edit of the sorted text to the sorted model: the lines of the
+        blocks touched by the edit are removed from the model and the new text of
+        these blocks is added. The model is dropped if it cannot follow the edit.
+        """
+        if self._rendering or self._sorted_model is None:
+            return
+        document = self._text_edit_widget.document()
+        first: int = document.findBlock(position).blockNumber()
+        last: int = document.findBlock(position + added).blockNumber()
+        if last < first:
+            last = document.blockCount() - 1
+        block_count: int = document.blockCount()
+        new_span: int = last - first + 1
+        old_span: int = new_span - (block_count - self._rendered_block_count)
+        if old_span < 1 or first + old_span > len(self._rendered_lines):
+            self._sorted_model = None
+            return
+        old_lines: list[str] = self._rendered_lines[first : first + old_span]
+        new_lines: list[str] = [
+            document.findBlockByNumber(number).text()
+            for number in range(first, last + 1)
+        ]
+        self._rendered_lines[first : first + old_span] = new_lines
+        self._rendered_block_count = block_count
+        try:
+            self._sorted_model.update(old_lines, new_lines)
+        except ValueError:
+            self._sorted_model = None
+
+    def unique_lines(self, ignore_case: bool = False) -> None:
+        """
+        Removes duplicate lines, keeping the first occurrence of every line. For an
+        opened file, distinct lines are spilled to disk when there are more than
+        FILE_MAX_DISTINCT_LINES of them.
+
+        :param self: The instance of this class that is calling this method
+        :param ignore_case: Whether or not lines that differ only in case are duplicates (default False)
+        :return: None
+        """
+        if self._file_buffer is not None:
+            if not self._file_busy():
+                self._run_file_action(
+                    lambda lines: _unique_file_lines(lines, ignore_case)
+                )
+            return
+        text: str = self._text_edit_widget.toPlainText()
+        lines: list[str] = su.make_lines(text)
+        unique: list[str] = su.unique_lines(lines, case_insensitive=ignore_case)
+        result: str = su.join_lines(unique, "\n")
+        self._set_text(result)
+
+    def count_lines(self, ignore_case: bool = False) -> None:
+        """
+        Replaces lines with their distinct values prefixed by the number of
+        occurrences, like "uniq -c" does. For an opened file, distinct lines are
+        spilled to disk when there are more than FILE_MAX_DISTINCT_LINES of them.
+
+        :param self: The instance of this class that is calling this method
+        :param ignore_case: Whether or not lines that differ only in case are counted together (default False)
+        :return: None
+        """
+        if self._file_buffer is not None:
+            if not self._file_busy():
+                self._run_file_action(
+                    lambda lines: _count_file_lines(lines, ignore_case)
+                )
+            return
+        text: str = self._text_edit_widget.toPlainText()
+        lines: list[str] = su.make_lines(text)
+        counts: list[tuple[str, int]] = su.count_lines(
+            lines, case_insensitive=ignore_case
+        )
+        result: str = su.join_lines(
+            ["{:>7} {}".format(line_count, line) for line, line_count in counts], "\n"
+        )
+        self._set_text(result)
+
+    def toggle_two_panes(self) -> None:
+        """
+        Shows or hides the second text area, the result area and the set
+        operations toolbar, depending on the state of the "Two Panes" action.
+        """
+        visible: bool = self._two_panes_action.isChecked()
+        self._second_text_edit_widget.setVisible(visible)
+        self._result_text_edit_widget.setVisible(visible)
+        self._set_toolbar.setVisible(visible)
+
+    def run_set_operation(
+        self, operation: Callable[[list[str], list[str], bool], list[str]]
+    ) -> None:
+        """
+        Applies a set operation to the lines of both text areas in a background
+        thread and shows the result in the result area when it is ready.
+
+        :param self: The instance of this class that is calling this method
+        :param operation: The set operation of core.string_utils to apply
+        :return: None
+        """
+        first_text: str = self._text_edit_widget.toPlainText()
+        second_text: str = self._second_text_edit_widget.toPlainText()
+        ignore_case: bool = self._set_ignore_case_action.isChecked()
+        self._set_operation_generation += 1
+        generation: int = self._set_operation_generation
+        self._result_text_edit_widget.setPlainText("")
+        self._result_text_edit_widget.setPlaceholderText("Computing...")
+        self._set_operation_task = run_in_background(
+            lambda: (
+                generation,
+                _apply_set_operation(operation, first_text, second_text, ignore_case),
+            ),
+            self._on_set_operation_finished,
+            self._on_set_operation_failed,
+        )
+
+    def _on_set_operation_finished(self, result: tuple[int, str]) -> None:
+        generation, text = result
+        if generation != self._set_operation_generation:
+            # A newer operation has been started, this result is stale.
+            return
+        self._result_text_edit_widget.setPlaceholderText("Result of set operation")
+        self._result_text_edit_widget.setPlainText(text)
+
+    def _on_set_operation_failed(self, message: str) -> None:
+        self._result_text_edit_widget.setPlaceholderText(message)
+
+
+def _apply_set_operation(
+    operation: Callable[[list[str], list[str], bool], list[str]],
+    first_text: str,
+    second_text: str,
+    ignore_case: bool,
+) -> str:
+    """
+    Splits both texts into lines, applies the set operation and joins the result.
+    """
+    first: list[str] = su.make_lines(first_text)
+    second: list[str] = su.make_lines(second_text)
+    return su.join_lines(operation(first, second, ignore_case), "\n")
+
+
+def _apply_file_action(
+    action: Callable[[su.LineBuffer], su.LineBuffer],
+    buffer: su.LineBuffer,
+    lines: su.LineBuffer | None,
+) -> su.LineBuffer:
+    """
+    Applies an action to the lines of an opened file, splitting the file by
+    newlines first if no action has been applied yet.
+    """
+    if lines is None:
+        lines = su.make_lines(buffer, separator="\n")
+    return action(lines)
+
+
+def _sort_file_lines(
+    lines: su.LineBuffer, direction: str, ignore_case: bool
+) -> su.LineBuffer:
+    """
+    Sorts the lines of an opened file with external_sort_lines, which spills runs
+    of DEFAULT_MEMORY_BUDGET bytes to disk, and copies the sorted lines into a new
+    buffer, so about the size of the file is kept in memory.
+    """
+    sorted_lines: Iterator[bytes] = su.external_sort_lines(
+        lines, order=direction, case_insensitive=ignore_case, binary=True
+    )
+    return su.LineBuffer.from_lines(sorted_lines, binary=True)
+
+
+def _unique_file_lines(lines: su.LineBuffer, ignore_case: bool) -> su.LineBuffer:
+    """
+    Removes duplicate lines of an opened file, spilling distinct lines to disk when
+    there are more than FILE_MAX_DISTINCT_LINES of them.
+    """
+    unique: Iterator[bytes] = su.iter_unique_lines(
+        lines, case_insensitive=ignore_case, max_distinct=FILE_MAX_DISTINCT_LINES
+    )
+    return su.LineBuffer.from_lines(unique, binary=True)
+
+
+def _count_file_lines(lines: su.LineBuffer, ignore_case: bool) -> su.LineBuffer:
+    """
+    Counts the lines of an opened file like "uniq -c" does, spilling distinct lines
+    to disk when there are more than FILE_MAX_DISTINCT_LINES of them.
+    """
+    counts: Iterator[tuple[bytes, int]] = su.iter_line_counts(
+        lines, case_insensitive=ignore_case, max_distinct=FILE_MAX_DISTINCT_LINES
+    )
+    return su.LineBuffer.from_lines(
+        (b"%7d %s" % (line_count, line) for line, line_count in counts), binary=True
+    )
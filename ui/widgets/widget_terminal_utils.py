@@ -1,4 +1,11 @@
-from PySide6.QtWidgets import QWidget, QToolBar, QPlainTextEdit, QVBoxLayout
+from PySide6.QtWidgets import (
+    QWidget,
+    QToolBar,
+    QPlainTextEdit,
+    QVBoxLayout,
+    QFileDialog,
+    QLabel,
+)
 
 import core.string_utils as su
 import core.terminal_commands as tc
@@ -9,6 +16,9 @@ class WidgetTerminalUtils(QWidget):
     A custom QWidget that provides a toolbar with actions for copying,
     pasting, cutting and clearing text as well as joining commands with
     or without ignoring errors. The widget also contains a text edit area.
+
+    Joined commands can also be saved straight to a file, which writes them
+    in chunks instead of building the whole joined command in memory.
     """
 
     def __init__(self):
@@ -37,10 +47,22 @@ class WidgetTerminalUtils(QWidget):
         self._terminal_util_toolbar.addAction(
             "Join Commands ignore errors", self.join_commands_ignore_errors
         )
+        self._terminal_util_toolbar.addAction(
+            "Save Joined Commands...", lambda: self.save_joined_commands(False)
+        )
+        self._terminal_util_toolbar.addAction(
+            "Save Joined Commands ignore errors...",
+            lambda: self.save_joined_commands(True),
+        )
+
+        self._error_label = QLabel()
+        self._error_label.setStyleSheet("color: red; font-weight: bold;")
+        self._error_label.hide()
 
         self._main_layout = QVBoxLayout()
         self._main_layout.addWidget(self._terminal_util_toolbar)
         self._main_layout.addWidget(self._text_edit)
+        self._main_layout.addWidget(self._error_label)
         self.setLayout(self._main_layout)
 
     def copy(self):
@@ -99,3 +121,27 @@ class WidgetTerminalUtils(QWidget):
         commands: list[str] = su.make_lines(commands_text, "\n")
         result: str = tc.join_commands_in_one(commands, ignore_errors=True)
         self._text_edit.setPlainText(result)
+
+    def save_joined_commands(self, ignore_errors: bool = False) -> None:
+        """
+        Opens a dialog to choose a file and writes the commands from the text
+        edit widget, joined into one command, into it. The joined command is
+        written in chunks and is not built in memory.
+
+        :param self: The instance of this class that is calling this method
+        :param ignore_errors: Whether to join commands with '&' instead of '&&' (default False)
+        :return: None
+        """
+        path, _ = QFileDialog.getSaveFileName(self, "Save Joined Commands")
+        if not path:
+            return
+        commands_text: str = self._text_edit.toPlainText()
+        commands: list[str] = su.make_lines(commands_text, "\n")
+        try:
+            with open(path, "w", encoding="utf-8") as output:
+                tc.write_commands_in_one(output, commands, ignore_errors=ignore_errors)
+        except OSError as ex:
+            self._error_label.setText("Cannot save {}: {}".format(path, ex))
+            self._error_label.show()
+            return
+        self._error_label.hide()